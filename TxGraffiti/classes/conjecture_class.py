@@ -1,5 +1,7 @@
 
-import matplotlib.pyplot as plt
+import numpy as np
+from TxGraffiti.functions.evaluate import name_index
+from TxGraffiti.functions.touch import touch_mask
 
 class Hypothesis:
     """
@@ -16,6 +18,10 @@ class Hypothesis:
         Returns the statement of the hypothesis.
     __repr__():
         Returns the statement of the hypothesis.
+    __eq__(other):
+        Returns True if the hypothesis has the same statement as the other hypothesis.
+    __hash__():
+        Returns the hash of the statement, so hypotheses can be used in sets and as dictionary keys.
     __call__(name, df):
         Returns the value of the hypothesis for the graph with the given name in the given dataframe.
     """
@@ -28,8 +34,14 @@ class Hypothesis:
     def __repr__(self):
         return f"{self.statement}"
 
+    def __eq__(self, other):
+        return isinstance(other, Hypothesis) and self.statement == other.statement
+
+    def __hash__(self):
+        return hash(self.statement)
+
     def __call__(self, name, df):
-        return df.loc[df["name"] == f"{name}.txt"][self.statement]
+        return df.iloc[[name_index(df).row(name)]][self.statement]
 
 
 class LinearConclusion:
@@ -59,6 +71,10 @@ class LinearConclusion:
         Returns True if the conclusion is equal to the other conclusion, and False otherwise.
     __ne__(other):
         Returns True if the conclusion is not equal to the other conclusion, and False otherwise.
+    __hash__():
+        Returns the hash of the key of the conclusion.
+    key():
+        Returns a tuple identifying the conclusion, equal for equal conclusions.
     __call__(name, df):
         Returns the value of the conclusion for the graph with the given name in the given dataframe.
     """
@@ -81,8 +97,15 @@ class LinearConclusion:
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def key(self):
+        return (self.lhs, self.inequality, self.slope, self.rhs, self.intercept)
+
+    def __hash__(self):
+        # Equal numbers hash equally in Python, e.g. Fraction(1, 2) and 0.5, so this agrees with __eq__.
+        return hash(self.key())
+
     def __call__(self, name, df):
-        data = df.loc[df["name"] == f"{name}.txt"]
+        data = df.iloc[[name_index(df).row(name)]]
         if self.inequality == "<=":
             return data[self.lhs] <= self.slope * data[self.rhs] + self.intercept
         else:
@@ -113,8 +136,16 @@ class LinearConjecture:
         Returns the value of the conjecture for the graph with the given name in the given dataframe.
     __eq__(other):
         Returns True if the conjecture is equal to the other conjecture, and False otherwise.
+    __hash__():
+        Returns the hash of the key of the conjecture.
+    key():
+        Returns a tuple identifying the conjecture, equal for equal conjectures.
     get_sharp_graphs(df):
         Returns the graphs that touch the conjecture.
+    get_sharp_bits(masks):
+        Returns the packed bitmask of the rows that touch the conjecture.
+    to_dict():
+        Returns the conjecture as a dictionary of JSON values.
 
     Examples
     --------
@@ -129,6 +160,7 @@ class LinearConjecture:
         self.conclusion = conclusion
         self.symbol = symbol
         self.touch = touch
+        self._sharp_bits = None
 
     def __repr__(self):
         hypothesis = f"If {self.symbol} is {self.hypothesis}"
@@ -150,7 +182,48 @@ class LinearConjecture:
     def __eq__(self, other):
         return self.hypothesis == other.hypothesis and self.conclusion == other.conclusion and self.symbol == other.symbol
 
+    def key(self):
+        return (self.hypothesis.statement, self.conclusion.key(), self.symbol)
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __getstate__(self):
+        # The cached sharp bits hold a HypothesisMasks, and with it the whole dataframe, so
+        # they are left out of pickles, e.g., of conjectures sent to worker processes.
+        state = self.__dict__.copy()
+        state["_sharp_bits"] = None
+        return state
+
+    def to_dict(self):
+        # Slopes and intercepts are exact fractions, written as strings such as "3/2".
+        return {
+            "hypothesis": self.hypothesis.statement,
+            "target": self.conclusion.lhs,
+            "inequality": self.conclusion.inequality,
+            "slope": str(self.conclusion.slope),
+            "other": self.conclusion.rhs,
+            "intercept": str(self.conclusion.intercept),
+            "touch": int(self.touch),
+            "conjecture": repr(self),
+        }
+
     def get_sharp_graphs(self, df):
-        return df.loc[(df[self.hypothesis.statement] == True) & (df[self.conclusion.lhs] == self.conclusion.slope * df[self.conclusion.rhs] + self.conclusion.intercept)]
+        sharp = touch_mask(df[self.conclusion.rhs].to_numpy(), df[self.conclusion.lhs].to_numpy(), self.conclusion.slope, self.conclusion.intercept)
+        return df.loc[(df[self.hypothesis.statement] == True).to_numpy() & sharp]
+
+    def get_sharp_bits(self, masks):
+        # The bitmask is computed once per HypothesisMasks and cached on the conjecture.
+        if self._sharp_bits is not None and self._sharp_bits[0] is masks:
+            return self._sharp_bits[1]
+        statement = self.hypothesis.statement
+        X = masks.values(self.conclusion.rhs, statement)
+        Y = masks.values(self.conclusion.lhs, statement)
+        sharp = np.zeros(masks.rows, dtype=bool)
+        scales = (masks.scale(self.conclusion.rhs), masks.scale(self.conclusion.lhs))
+        on_line = touch_mask(X, Y, self.conclusion.slope, self.conclusion.intercept, scales)
+        sharp[masks.indices(statement)[on_line]] = True
+        self._sharp_bits = (masks, np.packbits(sharp))
+        return self._sharp_bits[1]
 
 
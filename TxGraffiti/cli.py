@@ -0,0 +1,308 @@
+from TxGraffiti.functions.bound_cache import BoundCache
+from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+from TxGraffiti.functions.make_inequalities import conjectures_by_target
+from math_data.functions.dataset import load_dataset
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+__all__ = ["OUTPUT_FIELDS", "JOB_SETTINGS", "ConjectureWriter", "check_job", "open_dataset", "resolve_job", "run_job", "main"]
+
+# The fields of every output record, in the order of the csv columns.
+OUTPUT_FIELDS = [
+    "job",
+    "dataset",
+    "target",
+    "hypothesis",
+    "inequality",
+    "slope",
+    "other",
+    "intercept",
+    "touch",
+    "conjecture",
+]
+
+# The job settings that can be given on the command line and in a jobs file.
+JOB_SETTINGS = ["dataset", "targets", "invariants", "properties", "dalmatian", "workers", "prescreen"]
+
+
+class ConjectureWriter:
+    """
+    Writes conjectures as JSON Lines or csv records to a text stream, flushing after every
+    batch so that a consumer reading the stream sees them as soon as they are found.
+
+    Examples
+    --------
+    >>> from TxGraffiti.cli import ConjectureWriter
+    >>> import sys
+    >>> writer = ConjectureWriter(sys.stdout, "jsonl")
+    >>> writer.write([{"job": 0, "dataset": "graphs", "target": "domination_number"}])
+    """
+    def __init__(self, stream, output_format="jsonl"):
+        if output_format not in ["jsonl", "csv"]:
+            raise ValueError(f"Unknown output format {output_format}, use jsonl or csv.")
+        self.stream = stream
+        self.output_format = output_format
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, records):
+        for record in records:
+            if self._csv is not None:
+                self._csv.writerow(record)
+            else:
+                self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+def check_job(job):
+    """
+    Raises a ValueError if a job has settings other than JOB_SETTINGS, no dataset, or a setting
+    of the wrong type: "targets", "invariants", and "properties" must be lists of strings or
+    None, "workers" an int or None, and "dalmatian" and "prescreen" bools, or None for
+    "prescreen".
+    """
+    unknown = set(job) - set(JOB_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown job settings: {', '.join(sorted(unknown))}")
+    if not job.get("dataset") or not isinstance(job["dataset"], str):
+        raise ValueError("The job has no dataset.")
+    for setting in ["targets", "invariants", "properties"]:
+        names = job.get(setting)
+        if names is not None and (not isinstance(names, list) or not all(isinstance(name, str) for name in names)):
+            raise ValueError(f"The {setting} of a job must be a list of names.")
+    workers = job.get("workers")
+    if workers is not None and (not isinstance(workers, int) or isinstance(workers, bool) or workers < 0):
+        raise ValueError("The workers of a job must be a non-negative int.")
+    if not isinstance(job.get("dalmatian", True), bool):
+        raise ValueError("The dalmatian setting of a job must be true or false.")
+    if job.get("prescreen") is not None and not isinstance(job["prescreen"], bool):
+        raise ValueError("The prescreen setting of a job must be true, false, or null.")
+
+
+def _check_names(names, known, kind, dataset):
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown {kind} in {dataset}: {', '.join(unknown)}")
+
+
+def open_dataset(name, data_dir="math_data/data"):
+    """
+    Returns (df, invariants, properties, masks) for a dataset, where masks are its
+    HypothesisMasks with the masks of every property and the columns, scales, and hashes of
+    every invariant already computed, so that the jobs on the dataset start from warm state.
+    """
+    df, invariants, properties = load_dataset(name, data_dir)
+    masks = HypothesisMasks(df, properties)
+    for invariant in invariants:
+        masks.scale(invariant)
+        masks.affine_form(invariant)
+        masks.digest(invariant)
+    return df, invariants, properties, masks
+
+
+def resolve_job(job, datasets, data_dir="math_data/data"):
+    """
+    Returns (df, masks, targets, others, hypotheses) for a job, opening its dataset with
+    open_dataset if it is not in datasets yet, and raises a ValueError if the job names an
+    unknown invariant or property.
+    """
+    name = job["dataset"]
+    if name not in datasets:
+        datasets[name] = open_dataset(name, data_dir)
+    df, invariants, properties, masks = datasets[name]
+
+    targets = job.get("targets") or invariants
+    others = job.get("invariants") or invariants
+    hypotheses = job.get("properties") or properties
+    _check_names(list(targets) + list(others), invariants, "invariants", name)
+    _check_names(hypotheses, properties, "properties", name)
+    return df, masks, targets, others, hypotheses
+
+
+def run_job(job, index, datasets, writer, cache=None, data_dir="math_data/data"):
+    """
+    Runs one conjecturing job and writes its conjectures, target by target, as they are found.
+
+    All of the targets of a job are conjectured together with conjectures_by_target, so that
+    the bounds of every pair of invariants are shared between its targets and, with more than
+    one worker, a single process pool serves the whole job, while the conjectures of each
+    target are written as soon as its bounds are solved.
+
+    Parameters
+    ----------
+    job : dict
+        The settings of the job: "dataset" (required), "targets", "invariants", and
+        "properties" (lists of names, all of the dataset's if missing or None), "dalmatian"
+        (bool), "workers" (int, 0 or None for the number of CPUs), and "prescreen" (bool, or
+        None to pre-screen only without Dalmatian, see write_on_the_wall).
+    index : int
+        The number of the job, written with each conjecture.
+    datasets : dict
+        The opened datasets by name, see open_dataset, shared between jobs so that every
+        dataset is read once.
+    writer : ConjectureWriter
+        The writer of the conjectures.
+    cache : BoundCache
+        The cache of bounds shared between jobs, or None.
+    data_dir : string
+        The directory containing the datasets.
+
+    Returns
+    -------
+    int
+        The number of conjectures written.
+    """
+    name = job["dataset"]
+    df, masks, targets, others, hypotheses = resolve_job(job, datasets, data_dir)
+
+    written = 0
+    for target, conjectures in conjectures_by_target(
+        df, targets, others, hypotheses,
+        use_dalmation=job.get("dalmatian", True),
+        workers=job.get("workers", 1) or None,
+        prescreen=job.get("prescreen"),
+        cache=cache,
+        masks=masks,
+    ):
+        records = []
+        for conjecture in conjectures:
+            record = {"job": index, "dataset": name}
+            record.update(conjecture.to_dict())
+            records.append(record)
+        writer.write(records)
+        written += len(records)
+    return written
+
+
+def _read_jobs(path):
+    """
+    Yields (job, error) for the lines of a JSON Lines file, or of the standard input if path is
+    "-", skipping empty lines and lines starting with #. A line that is not a JSON object gives
+    the job None and an error message naming the line, so that the other jobs still run.
+    """
+    stream = sys.stdin if path == "-" else open(path)
+    try:
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as error:
+                yield None, f"{path}, line {number}: {error}"
+                continue
+            if not isinstance(job, dict):
+                yield None, f"{path}, line {number}: a job must be a JSON object"
+                continue
+            yield job, None
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m TxGraffiti.cli",
+        description="Conjecture linear inequalities on a dataset without prompts, writing the "
+                    "conjectures as JSON Lines or csv records as they are found.",
+    )
+    parser.add_argument("dataset", nargs="?", help="the name of the dataset in the data directory, e.g., graphs")
+    parser.add_argument("--jobs", help="a JSON Lines file of jobs, or - for the standard input; every job is an "
+                                       "object with the keys " + ", ".join(JOB_SETTINGS) + ", and the "
+                                       "command line options are the defaults of the missing keys")
+    parser.add_argument("-t", "--targets", nargs="+", help="the target invariants (default: all)")
+    parser.add_argument("-i", "--invariants", nargs="+", help="the invariants to bound in terms of (default: all)")
+    parser.add_argument("-p", "--properties", nargs="+", help="the properties used as hypotheses (default: all)")
+    parser.add_argument("--no-dalmatian", dest="dalmatian", action="store_false", help="do not apply Dalmatian")
+    parser.add_argument("--prescreen", dest="prescreen", action="store_true", default=None,
+                        help="skip the bounds that cannot survive filtering even with Dalmatian, which may "
+                             "change the conjectures it keeps (default: only without Dalmatian)")
+    parser.add_argument("--no-prescreen", dest="prescreen", action="store_false",
+                        help="solve every bound instead of skipping those that cannot survive filtering")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="the number of worker processes, 0 for the number of CPUs (default: 1)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl", help="the output format")
+    parser.add_argument("-o", "--output", default="-", help="the output file (default: the standard output)")
+    parser.add_argument("--data-dir", default="math_data/data", help="the directory containing the datasets")
+    parser.add_argument("--cache", help="the bound cache file (default: bound_cache.sqlite in the data directory)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or store cached bounds")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress on the standard error")
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the command line interface and returns its exit status, 1 if a job failed.
+
+    Examples
+    --------
+    $ python -m TxGraffiti.cli graphs -t domination_number -p "a connected graph" -f csv
+    $ python -m TxGraffiti.cli --jobs jobs.jsonl -o conjectures.jsonl
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.dataset is None and args.jobs is None:
+        parser.error("give a dataset or a jobs file")
+
+    defaults = {
+        "dataset": args.dataset,
+        "targets": args.targets,
+        "invariants": args.invariants,
+        "properties": args.properties,
+        "dalmatian": args.dalmatian,
+        "workers": args.workers,
+        "prescreen": args.prescreen,
+    }
+    if args.jobs is None:
+        jobs = [(defaults, None)]
+    else:
+        jobs = ((None if job is None else dict(defaults, **job), error) for job, error in _read_jobs(args.jobs))
+
+    cache = None
+    if not args.no_cache:
+        cache = BoundCache(args.cache or os.path.join(args.data_dir, "bound_cache.sqlite"))
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    writer = ConjectureWriter(output, args.format)
+
+    status = 0
+    datasets = {}
+    try:
+        for index, (job, error) in enumerate(jobs):
+            start = time.time()
+            try:
+                if error is not None:
+                    raise ValueError(error)
+                check_job(job)
+                written = run_job(job, index, datasets, writer, cache, args.data_dir)
+            except BrokenPipeError:
+                raise
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                print(f"job {index}: failed: {error}", file=sys.stderr)
+                status = 1
+                continue
+            if not args.quiet:
+                print(f"job {index}: {job['dataset']}, {written} conjectures in {time.time() - start:.2f}s",
+                      file=sys.stderr)
+    except BrokenPipeError:
+        # The reader of the output stopped, e.g., head; silence the final flush of stdout.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        status = 1
+    except OSError as error:
+        print(f"cannot read the jobs: {error}", file=sys.stderr)
+        status = 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if cache is not None:
+            cache.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
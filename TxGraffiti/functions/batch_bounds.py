@@ -0,0 +1,456 @@
+from TxGraffiti.classes.conjecture_class import Hypothesis, LinearConclusion, LinearConjecture
+from TxGraffiti.functions.equivalence import column_classes, property_classes
+from TxGraffiti.functions.bound_solver import exact_mean, hull_bounds, sorted_extremes, transposed_extremes, unique_points
+from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+from TxGraffiti.functions.prescreen import screen_bounds
+from TxGraffiti.functions.shared_arrays import SharedArrays, attach_shared_arrays
+from TxGraffiti.functions.touch import touch_count
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+import numpy as np
+import os
+import pandas as pd
+
+__all__ = ["batch_linear_bounds", "batch_linear_bounds_all", "iter_linear_bounds_all", "conjectures_from_table"]
+
+# The columns of the result table of batch_linear_bounds.
+TABLE_COLUMNS = [
+    "target",
+    "other",
+    "hypothesis",
+    "count",
+    "upper_slope",
+    "upper_intercept",
+    "upper_touch",
+    "upper_skip",
+    "lower_slope",
+    "lower_intercept",
+    "lower_touch",
+    "lower_skip",
+]
+
+
+def _mapped_line(slope, intercept, transform):
+    """
+    Returns the line y = m*x + b that is the image of the line Y = slope*X + intercept under the
+    transform (a, c, d, e) with x = a*X + c and y = d*Y + e.
+    """
+    a, c, d, e = transform
+    return d * slope / a, d * (intercept - slope * c / a) + e
+
+
+def _unmapped_line(slope, intercept, transform):
+    """
+    Returns the line Y = M*X + B whose image under the transform (a, c, d, e) is the line
+    y = slope*x + intercept, see _mapped_line.
+    """
+    a, c, d, e = transform
+    return slope * a / d, (slope * c + intercept - e) / d
+
+
+def _rounded_bounds(X, Y, counts, bounds, scales, skips=(None, None), transform=None):
+    """
+    Returns ((slope, intercept, touch, skip), (slope, intercept, touch, skip)) for the upper and
+    lower bounds of Y in terms of X, with the slopes and intercepts rounded to denominators of at
+    most 10 as in the conjectures. The points come with their multiplicities, which weigh
+    the touch counts, and the scales of the columns are passed on to touch_count. A bound with
+    a skip reason from screen_bounds is not solved and gets slope and intercept None and touch 0.
+
+    If a transform (a, c, d, e) is given, the bounds are returned for the columns x = a*X + c and
+    y = d*Y + e instead, see column_classes, and their touch counts are taken on (X, Y).
+    """
+    rounded = []
+    for (slope, intercept), skip in zip(bounds, skips):
+        if skip is not None:
+            rounded.append((None, None, 0, skip))
+            continue
+        slope, intercept = Fraction(slope), Fraction(intercept)
+        if transform is not None:
+            slope, intercept = _mapped_line(slope, intercept, transform)
+        slope = slope.limit_denominator(10)
+        intercept = intercept.limit_denominator(10)
+        line = (slope, intercept) if transform is None else _unmapped_line(slope, intercept, transform)
+        rounded.append((slope, intercept, touch_count(X, Y, *line, scales, counts=counts), None))
+    return tuple(rounded)
+
+
+def _pair_solutions(X, Y, hypothesis_masks, transposed=False, prescreen=False, scales=None):
+    """
+    Returns, for every hypothesis mask, the tuple (x, y, counts, bounds, skips, backward,
+    backward_skips) of the distinct points of the hypothesis with their multiplicities, the
+    exact bounds of Y in terms of X, and, if transposed is True, the exact bounds of X in terms
+    of Y read off of the same hull (otherwise zero), each with their skip reasons.
+
+    The rows of each hypothesis are collapsed to their distinct points with multiplicities
+    before bounding, so the hull and the touch counts work on far fewer points. The hull is
+    built on the columns times their scales (x_scale, y_scale), see rational_scale, as ints, or
+    as floats if a column is real-valued, see sorted_extremes. If prescreen is True, the bounds
+    that screen_bounds rules out are not solved, and the hull is not built when every bound of
+    the hypothesis is ruled out.
+    """
+    zero = (Fraction(0), Fraction(0)), (Fraction(0), Fraction(0))
+    unscreened = (None, None)
+    order = np.lexsort((Y, X))
+    sorted_X = X[order]
+    sorted_Y = Y[order]
+    solutions = []
+    for mask in hypothesis_masks:
+        keep = mask[order]
+        x = sorted_X[keep]
+        y = sorted_Y[keep]
+        skips = backward_skips = unscreened
+        if prescreen:
+            skips = screen_bounds(x, y)
+            if transposed:
+                backward_skips = screen_bounds(y, x)
+        x, y, counts = unique_points(x, y, is_sorted=True)
+        bounds = backward = zero
+        if len(x) > 0 and None in skips + (backward_skips if transposed else ()):
+            xs, lows, highs, mean, hull_scales = sorted_extremes(x, y, counts, scales)
+            bounds = hull_bounds(xs, lows, highs, mean, hull_scales)
+            if transposed:
+                backward_mean = exact_mean(y, counts, hull_scales[1])
+                backward = hull_bounds(*transposed_extremes(xs, lows, highs), backward_mean, hull_scales[::-1])
+        solutions.append((x, y, counts, bounds, skips, backward, backward_skips))
+    return solutions
+
+
+def _append_rows(table, target, other, properties, results):
+    """
+    Appends the rows of the bounds of target in terms of other to a table under construction.
+    """
+    for prop, (count, bounds) in zip(properties, results):
+        table["target"].append(target)
+        table["other"].append(other)
+        table["hypothesis"].append(prop)
+        table["count"].append(count)
+        for direction, (slope, intercept, touch, skip) in zip(["upper", "lower"], bounds):
+            table[f"{direction}_slope"].append(slope)
+            table[f"{direction}_intercept"].append(intercept)
+            table[f"{direction}_touch"].append(touch)
+            table[f"{direction}_skip"].append(skip)
+
+
+def batch_linear_bounds(df, target, others, properties, masks=None, prescreen=False, cache=None):
+    """
+    Returns a table of the optimal upper and lower linear bounds of a target in terms of every
+    other variable, under every hypothesis.
+
+    Every other column is sorted once by (other, target) and the order is shared by all of the
+    hypotheses: the rows of a hypothesis are picked out of the sorted columns with its mask, so
+    the lowest and highest target value above each distinct value of the other variable, and
+    with them the convex hull, come out without sorting again. Both bounds are read off of the
+    same hull and their touch counts are computed on the same rows.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    target : string
+        The name of the target variable.
+    others : list of strings
+        The names of the other variables.
+    properties : list of strings
+        The names of the hypothesis variables.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built for the given properties.
+    prescreen : bool
+        Whether to skip the bounds that screen_bounds shows cannot survive filter_conjectures.
+    cache : BoundCache
+        If given, the bounds are read from and stored in this cache of earlier runs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A table with one row per (other, hypothesis) pair with other != target, in the order of
+        make_all_upper_linear_conjectures, and the columns "target", "other", "hypothesis",
+        "count" (the number of objects satisfying the hypothesis), and "upper_slope",
+        "upper_intercept", "upper_touch", "upper_skip", "lower_slope", "lower_intercept",
+        "lower_touch", "lower_skip". The slopes and intercepts are Fractions with denominators
+        at most 10, as in the conjectures. The skip columns hold the reason a bound was skipped
+        by the pre-screen, and are missing (NA) where it was solved; a skipped bound has slope
+        and intercept None and touch 0.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.batch_bounds import batch_linear_bounds
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> table = batch_linear_bounds(df, "domination_number", ["order", "size"], ["a connected graph", "a tree graph"])
+    """
+    return batch_linear_bounds_all(df, [target], others, properties, masks, prescreen=prescreen, cache=cache)[target]
+
+
+# The columns and hypothesis masks of a batch_linear_bounds_all run, set in each worker process.
+_worker_data = None
+
+
+def _set_worker_data(columns, hypothesis_masks, blocks=()):
+    global _worker_data
+    _worker_data = (columns, hypothesis_masks, blocks)
+
+
+def _attach_worker_data(column_spec, mask_spec, rows):
+    """
+    Sets the data of a worker process from the shared memory blocks of the columns and of the
+    packed hypothesis masks.
+    """
+    column_block, columns = attach_shared_arrays(column_spec)
+    mask_block, masks = attach_shared_arrays(mask_spec)
+    hypothesis_masks = [np.unpackbits(bits, count=rows).astype(bool) for bits in masks["masks"]]
+    _set_worker_data(columns, hypothesis_masks, (column_block, mask_block))
+
+
+def _solve_pair(task, columns, hypothesis_masks):
+    """
+    Computes the bounds of a column Y in terms of a column X under every hypothesis and, if
+    there are backward members, the bounds of X in terms of Y from the same hulls, and maps them
+    onto the (target, other, transform) members of the pair, see column_classes. Returns a list
+    of (target, other, results) triples.
+    """
+    x_name, y_name, scales, prescreen, members, backward_members = task
+    solutions = _pair_solutions(columns[x_name], columns[y_name], hypothesis_masks, bool(backward_members), prescreen, scales)
+    output = []
+    for target, other, transform in members:
+        output.append((target, other, [
+            (int(np.sum(counts)), _rounded_bounds(x, y, counts, bounds, scales, skips, transform))
+            for x, y, counts, bounds, skips, _, _ in solutions
+        ]))
+    for target, other, transform in backward_members:
+        output.append((target, other, [
+            (int(np.sum(counts)), _rounded_bounds(y, x, counts, backward, scales[::-1], backward_skips, transform))
+            for x, y, counts, _, _, backward, backward_skips in solutions
+        ]))
+    return output
+
+
+def _pair_task(task):
+    """
+    Solves a pair in a worker process of iter_linear_bounds_all, see _solve_pair.
+    """
+    columns, hypothesis_masks, _ = _worker_data
+    return _solve_pair(task, columns, hypothesis_masks)
+
+
+def batch_linear_bounds_all(df, targets, others, properties, masks=None, workers=1, prescreen=False, cache=None):
+    """
+    Returns the tables of batch_linear_bounds for many targets at once, sharing the work between
+    targets.
+
+    The hypothesis masks and columns are extracted once for all targets, and every unordered
+    pair of variables that are both targets and others is sorted and solved once per hypothesis:
+    the hull of the points (x, y) swapped is the hull of the points (y, x), so the bounds of
+    each variable in terms of the other are read off of the same hull.
+
+    Before solving, the columns are grouped into classes of identical or positive affine-
+    equivalent columns with column_classes, and the properties into classes selecting the same
+    objects with property_classes. Each pair of column classes is solved once, for one property
+    of each class, and its bounds are mapped onto every pair of member columns and copied to
+    every equivalent property, so the tables are the same as if every pair had been solved.
+
+    With a cache, the bounds of earlier runs are looked up first, and only the pairs with a bound
+    missing from the cache are solved and stored.
+
+    With more than one worker the (target, other) pairs, each with all of its hypotheses, are
+    spread over a process pool. The columns and the packed hypothesis masks are placed in shared
+    memory once, so the tasks only carry variable names. The tables are assembled in the same
+    order as in a serial run, so the result does not depend on the number of workers.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    targets : list of strings
+        The names of the target variables.
+    others : list of strings
+        The names of the other variables.
+    properties : list of strings
+        The names of the hypothesis variables.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built for the given properties.
+    workers : int
+        The number of worker processes. If None, the number of CPUs is used.
+    prescreen : bool
+        Whether to skip the bounds that screen_bounds shows cannot survive filter_conjectures.
+    cache : BoundCache
+        If given, the bounds are read from and stored in this cache of earlier runs.
+
+    Returns
+    -------
+    dict
+        A dictionary from each target to its table, equal to batch_linear_bounds(df, target,
+        others, properties, prescreen=prescreen).
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.batch_bounds import batch_linear_bounds_all
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> tables = batch_linear_bounds_all(df, ["order", "size"], ["order", "size"], ["a connected graph"], workers=2)
+    """
+    return dict(iter_linear_bounds_all(df, targets, others, properties, masks, workers, prescreen, cache))
+
+
+def iter_linear_bounds_all(df, targets, others, properties, masks=None, workers=1, prescreen=False, cache=None):
+    """
+    Yields (target, table) for every target, in the order of the targets, with the tables of
+    batch_linear_bounds_all, each as soon as all of the pairs it needs are solved.
+
+    The pairs are solved in the order of their first target, so with one worker the first
+    table comes after the pairs of the first target only, and with more workers the pairs of
+    later targets are already being solved while it is used. The bounds solved for a table are
+    stored in the cache when the table is yielded. Stopping early shuts the process pool down.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.batch_bounds import iter_linear_bounds_all
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> for target, table in iter_linear_bounds_all(df, ["order", "size"], ["order", "size"], ["a connected graph"]):
+    ...     print(target, len(table))
+    """
+    if masks is None:
+        masks = HypothesisMasks(df, properties)
+    names = list(dict.fromkeys(list(targets) + list(others)))
+    columns = {name: masks.column(name) for name in names}
+    classes = column_classes(masks, names)
+    hypothesis_classes = property_classes(masks, properties)
+    solved_properties = list(dict.fromkeys(hypothesis_classes.values()))
+    position = {prop: i for i, prop in enumerate(solved_properties)}
+
+    # Read the bounds of earlier runs from the cache.
+    cached = {}
+    keys = {}
+    if cache is not None:
+        keys = {(target, other): [cache.key(masks, other, target, prop, prescreen) for prop in properties]
+                for target in targets for other in others if other != target}
+        found = cache.get_many(key for pair_keys in keys.values() for key in pair_keys)
+        for pair, pair_keys in keys.items():
+            if all(key in found for key in pair_keys):
+                cached[pair] = [found[key] for key in pair_keys]
+
+    # Group the (target, other) pairs by the pair of classes (X, Y) of (other, target), so that
+    # both directions of a pair of classes are solved from the same hulls. A target and other
+    # of the same class are solved as they are.
+    pairs = {}
+    for target in targets:
+        for other in others:
+            if other == target or (target, other) in cached:
+                continue
+            y_name, d, e = classes[target]
+            x_name, a, c = classes[other]
+            if x_name == y_name:
+                pairs.setdefault((other, target), ([], []))[0].append((target, other, None))
+                continue
+            transform = None if (x_name, y_name) == (other, target) else (a, c, d, e)
+            if (y_name, x_name) in pairs:
+                pairs[(y_name, x_name)][1].append((target, other, transform))
+            else:
+                pairs.setdefault((x_name, y_name), ([], []))[0].append((target, other, transform))
+    tasks = [(x_name, y_name, (masks.scale(x_name), masks.scale(y_name)), prescreen, members, backward_members)
+             for (x_name, y_name), (members, backward_members) in pairs.items()]
+
+    # The number of tasks each target still waits for.
+    waiting = dict.fromkeys(targets, 0)
+    for task in tasks:
+        for target in {target for target, _, _ in task[4] + task[5]}:
+            waiting[target] += 1
+
+    results = dict(cached)
+    solved = {}
+    ready = 0
+
+    def finished_tables():
+        # Yields the tables of the leading targets that no longer wait for a task.
+        nonlocal ready
+        while ready < len(targets) and waiting[targets[ready]] == 0:
+            target = targets[ready]
+            ready += 1
+            if cache is not None and solved:
+                cache.put_many({key: result for pair, rows in solved.items() for key, result in zip(keys[pair], rows)})
+                solved.clear()
+            table = {column: [] for column in TABLE_COLUMNS}
+            for other in others:
+                if other != target:
+                    _append_rows(table, target, other, properties, results[(target, other)])
+            yield target, pd.DataFrame(table, columns=TABLE_COLUMNS)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    executor = shared_columns = shared_masks = None
+    try:
+        if workers == 1 or not tasks:
+            hypothesis_masks = [masks.mask(prop) for prop in solved_properties]
+            outputs = (_solve_pair(task, columns, hypothesis_masks) for task in tasks)
+        else:
+            shared_columns = SharedArrays(columns)
+            packed = np.zeros((len(solved_properties), (masks.rows + 7) // 8), dtype=np.uint8)
+            for i, prop in enumerate(solved_properties):
+                packed[i] = masks.bits(prop)
+            shared_masks = SharedArrays({"masks": packed})
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker_data,
+                                           initargs=(shared_columns.spec, shared_masks.spec, masks.rows))
+            chunksize = max(1, len(tasks) // (16 * workers))
+            outputs = executor.map(_pair_task, tasks, chunksize=chunksize)
+
+        yield from finished_tables()
+        for output in outputs:
+            for target, other, rows in output:
+                results[(target, other)] = solved[(target, other)] = [
+                    rows[position[hypothesis_classes[prop]]] for prop in properties
+                ]
+            for target in {target for target, _, _ in output}:
+                waiting[target] -= 1
+            yield from finished_tables()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if shared_columns is not None:
+            shared_columns.close()
+        if shared_masks is not None:
+            shared_masks.close()
+
+
+def conjectures_from_table(table, symbol="G"):
+    """
+    Returns the upper and lower LinearConjecture objects of a table of bounds, leaving out the
+    bounds that were skipped by the pre-screen.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        A table of bounds as returned by batch_linear_bounds.
+    symbol : string
+        The symbol of the object in the conjectures.
+
+    Returns
+    -------
+    tuple of lists of LinearConjecture
+        The upper and the lower conjectures, in the order of the rows of the table.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.batch_bounds import batch_linear_bounds, conjectures_from_table
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> table = batch_linear_bounds(df, "domination_number", ["order", "size"], ["a connected graph", "a tree graph"])
+    >>> upper, lower = conjectures_from_table(table)
+    """
+    upper = []
+    lower = []
+    for row in table.itertuples(index=False):
+        if pd.isna(row.upper_skip):
+            upper.append(LinearConjecture(
+                Hypothesis(row.hypothesis),
+                LinearConclusion(row.target, "<=", row.upper_slope, row.other, row.upper_intercept),
+                symbol,
+                row.upper_touch,
+            ))
+        if pd.isna(row.lower_skip):
+            lower.append(LinearConjecture(
+                Hypothesis(row.hypothesis),
+                LinearConclusion(row.target, ">=", row.lower_slope, row.other, row.lower_intercept),
+                symbol,
+                row.lower_touch,
+            ))
+    return upper, lower
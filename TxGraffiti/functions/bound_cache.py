@@ -0,0 +1,173 @@
+from fractions import Fraction
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+__all__ = ["BoundCache"]
+
+# The version of the cached entries; entries of other versions are never read.
+CACHE_VERSION = 2
+
+# The solver settings the cached bounds depend on: the solver and the largest denominator of
+# the rounded slopes and intercepts.
+SOLVER_SETTINGS = "hull|limit_denominator(10)"
+
+# The number of keys looked up per query, below the SQLite limit on query parameters.
+_CHUNK = 500
+
+# The seconds after which a read refreshes the last use of an entry. Reads of entries used more
+# recently write nothing, so that concurrent readers rarely wait for the write lock.
+USED_RESOLUTION = 3600
+
+# The default cache file, in the data directory of the repository wherever it is imported from.
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "math_data", "data", "bound_cache.sqlite",
+)
+
+
+def _encode(result):
+    """
+    Returns the JSON text of a result (count, bounds) of batch_linear_bounds_all.
+    """
+    count, bounds = result
+    return json.dumps([count, [
+        [None if slope is None else str(slope), None if intercept is None else str(intercept), touch, skip]
+        for slope, intercept, touch, skip in bounds
+    ]])
+
+
+def _decode(text):
+    """
+    Returns the result (count, bounds) of the JSON text written by _encode.
+    """
+    count, bounds = json.loads(text)
+    return count, tuple(
+        (None if slope is None else Fraction(slope), None if intercept is None else Fraction(intercept), touch, skip)
+        for slope, intercept, touch, skip in bounds
+    )
+
+
+class BoundCache:
+    """
+    A disk-backed cache of the bounds of batch_linear_bounds_all, shared between runs.
+
+    Every entry holds the count and the rounded upper and lower bounds, with their touch numbers,
+    of one column in terms of another under one hypothesis. It is keyed by a hash of the values
+    of both columns, of the bitmask of the hypothesis, of whether the bounds were pre-screened,
+    and of the solver settings, so that the same bounds are found again in any dataset, under
+    any names, and an entry is never used once one of its columns or its hypothesis changes.
+    Entries that are no longer used are evicted, least recently used first, once the cache holds
+    more than max_entries of them; the last use of an entry is only refreshed by a read once it
+    is older than USED_RESOLUTION seconds.
+
+    Attributes
+    ----------
+    path : string
+        The SQLite database file of the cache, by default DEFAULT_PATH.
+    max_entries : int
+        The largest number of entries kept.
+    hits : int
+        The number of bounds read from the cache.
+    misses : int
+        The number of bounds looked up but not found.
+
+    Methods
+    -------
+    key(masks, other, target, hypothesis, prescreen):
+        Returns the key of the bounds of target in terms of other under the hypothesis.
+    get_many(keys):
+        Returns a dictionary of the results of the given keys that are in the cache.
+    put_many(results):
+        Stores a dictionary of results by key, evicting old entries if needed.
+    clear():
+        Removes every entry.
+    close():
+        Closes the database.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.bound_cache import BoundCache
+    >>> from TxGraffiti.functions.make_inequalities import write_on_the_wall
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> cache = BoundCache()
+    >>> conjectures = write_on_the_wall(df, ["domination_number"], ["order", "size"], ["a connected graph"], cache=cache)
+    >>> conjectures = write_on_the_wall(df, ["domination_number"], ["order", "size"], ["a connected graph"], cache=cache)
+    >>> cache.hits
+    2
+    """
+    def __init__(self, path=None, max_entries=500000):
+        if path is None:
+            path = DEFAULT_PATH
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS bounds (key TEXT PRIMARY KEY, result TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS bounds_used ON bounds (used)")
+        self._connection.commit()
+
+    def key(self, masks, other, target, hypothesis, prescreen):
+        text = "|".join([
+            str(CACHE_VERSION),
+            SOLVER_SETTINGS,
+            str(bool(prescreen)),
+            masks.digest(other),
+            masks.digest(target),
+            masks.mask_digest(hypothesis),
+        ])
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        stale = []
+        now = time.time()
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            rows = self._connection.execute(
+                f"SELECT key, result, used FROM bounds WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for key, result, used in rows:
+                found[key] = _decode(result)
+                if used < now - USED_RESOLUTION:
+                    stale.append(key)
+        if stale:
+            self._connection.executemany("UPDATE bounds SET used = ? WHERE key = ?", [(now, key) for key in stale])
+            self._connection.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, results):
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO bounds (key, result, used) VALUES (?, ?, ?)",
+            [(key, _encode(result), now) for key, result in results.items()],
+        )
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM bounds WHERE key IN (SELECT key FROM bounds ORDER BY used LIMIT ?)", (excess,)
+            )
+        self._connection.commit()
+
+    def clear(self):
+        self._connection.execute("DELETE FROM bounds")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM bounds").fetchone()[0]
@@ -0,0 +1,413 @@
+from TxGraffiti.functions.touch import rational_scale
+from fractions import Fraction
+import numpy as np
+
+__all__ = ["unique_points", "sorted_extremes", "exact_mean", "hull_bounds", "transposed_extremes", "linear_bounds", "upper_linear_bound", "lower_linear_bound", "pulp_linear_bound"]
+
+
+def _exact(value):
+    """
+    Returns the given number as an exact int or Fraction.
+    """
+    if isinstance(value, (int, np.integer, np.bool_)):
+        return int(value)
+    if isinstance(value, Fraction):
+        return value
+    return Fraction(float(value))
+
+
+def _hull_scales(X, Y, scales=None):
+    """
+    Returns the scales (x_scale, y_scale) a hull of the points (X, Y) is built with: the scales
+    of the columns, see rational_scale, computed from X and Y if None, or (None, None) if either
+    column is real-valued.
+    """
+    if scales is None:
+        scales = (rational_scale(X), rational_scale(Y))
+    if None in scales:
+        return None, None
+    return tuple(scales)
+
+
+def _hull_values(values, scale):
+    """
+    Returns the values of a column as the Python numbers a hull is built on: the ints
+    values*scale if the column has a scale, see rational_scale, and floats otherwise, so that
+    the hull never needs Fraction arithmetic.
+    """
+    values = np.asarray(values)
+    if scale is None:
+        return values.astype(float).tolist()
+    if values.dtype.kind in "iub":
+        return values.astype(np.int64).tolist()
+    return np.rint(values * scale).astype(np.int64).tolist()
+
+
+def _weighted_mean(values, counts):
+    """
+    Returns the exact mean of a list of ints or floats, each counted with its multiplicity.
+    """
+    return sum(_exact(x) * int(c) for x, c in zip(values, counts)) / Fraction(int(np.sum(counts)))
+
+
+def _cross(o, a, b):
+    """
+    Returns the cross product of the vectors o->a and o->b.
+    """
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _chain(points):
+    """
+    Returns one monotone chain of a convex hull (Andrew's algorithm). Given points sorted by
+    increasing x the chain is the lower hull; given them sorted by decreasing x it is the upper
+    hull. Collinear points are dropped.
+    """
+    chain = []
+    for p in points:
+        while len(chain) >= 2 and _cross(chain[-2], chain[-1], p) <= 0:
+            chain.pop()
+        chain.append(p)
+    return chain
+
+
+def unique_points(X, Y, counts=None, is_sorted=False):
+    """
+    Returns the distinct points (X, Y) with their multiplicities.
+
+    Datasets of graphs repeat the same pair of values many times, e.g., every graph with the
+    same order and domination number, and every copy would be its own constraint of the linear
+    program. The bounds only depend on the distinct points weighted by how often they occur.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+    counts : numpy.ndarray
+        The multiplicity of each given point. If None, every point counts once.
+    is_sorted : bool
+        Whether the points are already sorted by (X, Y).
+
+    Returns
+    -------
+    tuple
+        Arrays (X, Y, counts) of the distinct points sorted by (X, Y) and their multiplicities.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.bound_solver import unique_points
+    >>> import numpy as np
+    >>> unique_points(np.array([2, 1, 2]), np.array([3, 1, 3]))
+    (array([1, 2]), array([1, 3]), array([1, 2]))
+    """
+    X = np.asarray(X)
+    Y = np.asarray(Y)
+    counts = np.ones(len(X), dtype=np.int64) if counts is None else np.asarray(counts)
+    if not is_sorted:
+        order = np.lexsort((Y, X))
+        X, Y, counts = X[order], Y[order], counts[order]
+    if len(X) == 0:
+        return X, Y, counts
+    starts = np.flatnonzero(np.r_[True, (X[1:] != X[:-1]) | (Y[1:] != Y[:-1])])
+    return X[starts], Y[starts], np.add.reduceat(counts, starts)
+
+
+def sorted_extremes(X, Y, counts=None, scales=None):
+    """
+    Returns the distinct values of X in increasing order, the lowest and the highest value of Y
+    above each of them, the exact mean of X, and the scales of the hull, given non-empty arrays
+    of points sorted by (X, Y), e.g., with numpy.lexsort((Y, X)), and optionally the
+    multiplicity of each point and the scales (x_scale, y_scale) of the columns, see
+    rational_scale. The result is the input of hull_bounds.
+
+    When both columns are integer or exact ratio columns the values are returned times their
+    scales as ints, and otherwise as floats, so the hull is built in int or float arithmetic
+    rather than on Fractions; hull_bounds scales the bounds back. The mean is exact, in the
+    same units as the values.
+    """
+    starts = np.flatnonzero(np.r_[True, X[1:] != X[:-1]])
+    ends = np.r_[starts[1:], len(X)] - 1
+    if counts is None:
+        counts = ends - starts + 1
+    else:
+        counts = np.add.reduceat(counts, starts)
+
+    x_scale, y_scale = scales = _hull_scales(X, Y, scales)
+    xs = _hull_values(X[starts], x_scale)
+    lows = _hull_values(Y[starts], y_scale)
+    highs = _hull_values(Y[ends], y_scale)
+    return xs, lows, highs, _weighted_mean(xs, counts), scales
+
+
+def _supporting_line(chain, x):
+    """
+    Returns the (slope, intercept) of the hull edge in the given chain that lies above or below
+    x. The LP optimum is not unique when x is a vertex of the chain or when the chain has a single
+    vertex, i.e., when X is constant. The tie is broken by a fixed rule: at a vertex the edge to
+    its left is used, and a single vertex gives the horizontal line through it. CBC does not
+    follow any fixed rule there, see linear_bounds.
+    """
+    if len(chain) == 1:
+        return Fraction(0), Fraction(_exact(chain[0][1]))
+    for (x1, y1), (x2, y2) in zip(chain, chain[1:]):
+        if x <= x2:
+            break
+    x1, y1, x2, y2 = _exact(x1), _exact(y1), _exact(x2), _exact(y2)
+    slope = Fraction(y2 - y1) / (x2 - x1)
+    return slope, y1 - slope * x1
+
+
+def _unscaled_line(slope, intercept, scales):
+    """
+    Returns the line y = slope*x + intercept of scaled points (x_scale*x, y_scale*y) in the
+    units of the unscaled points.
+    """
+    x_scale, y_scale = (scale or 1 for scale in scales)
+    return slope * Fraction(x_scale, y_scale), intercept / y_scale
+
+
+def exact_mean(values, counts=None, scale=None):
+    """
+    Returns the exact mean of a non-empty array of numbers, each counted with its multiplicity
+    if counts are given, as a Fraction. If scale is given, the mean of the values times scale
+    is returned, in the units of the hull of sorted_extremes.
+    """
+    if counts is None:
+        counts = np.ones(len(values), dtype=np.int64)
+    distinct, inverse = np.unique(values, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=counts, minlength=len(distinct))
+    if scale is None:
+        return _weighted_mean(distinct.tolist(), totals)
+    return _weighted_mean(_hull_values(distinct, scale), totals)
+
+
+def _hull_chains(xs, lows, highs):
+    """
+    Returns the upper and lower chains of the convex hull of the given extremes, both sorted by
+    increasing x.
+    """
+    upper = _chain(list(zip(xs, highs))[::-1])[::-1]
+    lower = _chain(list(zip(xs, lows)))
+    return upper, lower
+
+
+def hull_bounds(xs, lows, highs, mean, scales=(1, 1)):
+    """
+    Returns the optimal upper and lower linear bounds of a set of points, given only the lowest
+    and the highest point above each distinct x value, since no other point can lie on the
+    convex hull.
+
+    Parameters
+    ----------
+    xs : list
+        The distinct x values in increasing order, as ints or floats.
+    lows : list
+        The lowest y value above each x value.
+    highs : list
+        The highest y value above each x value.
+    mean : Fraction
+        The mean of the x values of all of the points, counted with multiplicity.
+    scales : tuple
+        The scales (x_scale, y_scale) the values were multiplied by, see sorted_extremes, with
+        None for unscaled values. The bounds are returned in the units of the unscaled points.
+
+    Returns
+    -------
+    tuple
+        A pair ((upper_slope, upper_intercept), (lower_slope, lower_intercept)) of exact
+        Fractions, see linear_bounds.
+    """
+    upper, lower = _hull_chains(xs, lows, highs)
+    return (
+        _unscaled_line(*_supporting_line(upper, mean), scales),
+        _unscaled_line(*_supporting_line(lower, mean), scales),
+    )
+
+
+def transposed_extremes(xs, lows, highs):
+    """
+    Returns the extremes of the same points with the coordinates swapped, in the form taken by
+    hull_bounds.
+
+    The convex hull of the swapped points is the swapped convex hull, so only the vertices of
+    the hull are swapped and regrouped; the bounds of x in terms of y then follow without going
+    back to the points. Together with the exact mean of the y values, in the same units, and the
+    swapped scales, the result gives the same bounds as sorted_extremes applied to the swapped
+    points.
+
+    Parameters
+    ----------
+    xs : list
+        The distinct x values in increasing order.
+    lows : list
+        The lowest y value above each x value.
+    highs : list
+        The highest y value above each x value.
+
+    Returns
+    -------
+    tuple
+        The distinct y values of the hull vertices in increasing order, and the lowest and the
+        highest x value of a vertex at each of them.
+    """
+    upper, lower = _hull_chains(xs, lows, highs)
+    extremes = {}
+    for x, y in upper + lower:
+        low, high = extremes.get(y, (x, x))
+        extremes[y] = (min(low, x), max(high, x))
+    ys = sorted(extremes)
+    return ys, [extremes[y][0] for y in ys], [extremes[y][1] for y in ys]
+
+
+def linear_bounds(X, Y, counts=None):
+    """
+    Returns the optimal upper and lower linear bounds of Y in terms of X.
+
+    The upper bound is the line y = w*x + b minimizing sum(w*X + b - Y) subject to
+    w*x + b >= y for every point, and the lower bound is the line maximizing the same sum subject
+    to w*x + b <= y. Since the objective only depends on the mean of X, both optima are edges of
+    the convex hull of the points lying above and below that mean, so both bounds are read off
+    of a single hull without calling an LP solver.
+
+    When the optimum is not unique, the bound is chosen as in _supporting_line: the hull edge
+    to the left of the mean if the mean is the x value of a hull vertex, and the horizontal
+    line through the extreme point if X is constant. pulp_linear_bound returns whichever
+    optimal line CBC stops at, which can differ in exactly these cases, with the same
+    objective value. For example, on graphs.csv, under "a connected and bipartite graph" the
+    upper bound of domination_number in terms of the constant chromatic_number is 0*x + 7 here
+    and 3.5*x with CBC, and under "a connected, claw-free, and cubic graph" a
+    power_domination_number bound whose mean lands on a vertex is 2*x here and 0*x + 4 with
+    CBC. write_on_the_wall without Dalmatian therefore finds 142 conjectures there with the
+    hull solver and 143 with PuLP; apart from such ties, both solvers give the same bounds.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+    counts : numpy.ndarray
+        The multiplicity of each point, e.g., as returned by unique_points. If None, every
+        point counts once.
+
+    Returns
+    -------
+    tuple
+        A pair ((upper_slope, upper_intercept), (lower_slope, lower_intercept)) of exact
+        Fractions. Both bounds are (0, 0) when there are no points.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.bound_solver import linear_bounds
+    >>> import numpy as np
+    >>> linear_bounds(np.array([1, 2, 3]), np.array([1, 3, 3]))
+    ((Fraction(2, 1), Fraction(-1, 1)), (Fraction(1, 1), Fraction(0, 1)))
+    """
+    X = np.asarray(X)
+    Y = np.asarray(Y)
+    if len(X) == 0:
+        return (Fraction(0), Fraction(0)), (Fraction(0), Fraction(0))
+    scales = (rational_scale(X), rational_scale(Y))
+    X, Y, counts = unique_points(X, Y, counts)
+    return hull_bounds(*sorted_extremes(X, Y, counts, scales))
+
+
+def pulp_linear_bound(X, Y, direction, counts=None):
+    """
+    Returns a linear bound of Y in terms of X by solving the linear program with PuLP. The
+    program has one constraint per distinct point, and the objective weighs every point by its
+    multiplicity, so it is the same program as with one constraint per row.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+    direction : string
+        Either "<=" for an upper bound or ">=" for a lower bound.
+    counts : numpy.ndarray
+        The multiplicity of each point. If None, every point counts once.
+
+    Returns
+    -------
+    tuple
+        The (slope, intercept) of the bound as floats.
+    """
+    from pulp import LpProblem, LpMinimize, LpMaximize, LpVariable
+
+    # Initialize the LP, say "prob".
+    prob = LpProblem("Test_Problem", LpMinimize if direction == "<=" else LpMaximize)
+
+    # Initialize the variables for the LP.
+    w = LpVariable("w")
+    b = LpVariable("b")
+
+    # Collapse repeated points, keeping their multiplicities as weights.
+    X, Y, counts = unique_points(X, Y, counts)
+
+    # Define the objective function, sum(counts * (w*X + b - Y)).
+    prob += float(np.sum(counts * X)) * w + int(np.sum(counts)) * b - float(np.sum(counts * Y))
+
+    # Define the LP constraints.
+    for x, y in zip(X, Y):
+        if direction == "<=":
+            prob += w*x + b - y >= 0
+        else:
+            prob += w*x + b - y <= 0
+
+    # Solve the LP.
+    prob.solve()
+    return w.varValue, b.varValue
+
+
+def upper_linear_bound(X, Y, solver="hull", counts=None):
+    """
+    Returns the (slope, intercept) of the optimal upper linear bound of Y in terms of X.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LP with PuLP.
+    counts : numpy.ndarray
+        The multiplicity of each point. If None, every point counts once.
+
+    Returns
+    -------
+    tuple
+        The (slope, intercept) of the bound.
+    """
+    if solver == "pulp":
+        return pulp_linear_bound(X, Y, "<=", counts)
+    return linear_bounds(X, Y, counts)[0]
+
+
+def lower_linear_bound(X, Y, solver="hull", counts=None):
+    """
+    Returns the (slope, intercept) of the optimal lower linear bound of Y in terms of X.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LP with PuLP.
+    counts : numpy.ndarray
+        The multiplicity of each point. If None, every point counts once.
+
+    Returns
+    -------
+    tuple
+        The (slope, intercept) of the bound.
+    """
+    if solver == "pulp":
+        return pulp_linear_bound(X, Y, ">=", counts)
+    return linear_bounds(X, Y, counts)[1]
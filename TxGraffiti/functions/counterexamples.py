@@ -0,0 +1,277 @@
+from math_data.functions.invariant_functions import EvaluationContext, evaluation_order, get_node, plain_value
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import os
+import traceback
+import grinpy as gp
+
+__all__ = ["evaluation_cost", "search_plan", "check_graph", "find_counterexamples", "read_graph6"]
+
+# The conjectures of a search, set once in every worker process by _init_worker.
+_conjectures = None
+
+
+def evaluation_cost(name):
+    """
+    Returns the number of expensive values computed from the graph itself, i.e., registered
+    without cheap=True, that a name needs. Values such as the order or the connectedness of a
+    graph are free, and arithmetic on other values adds nothing.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.counterexamples import evaluation_cost
+    >>> evaluation_cost("a connected graph"), evaluation_cost("(order - domination_number)")
+    (0, 1)
+    """
+    return sum(
+        1 for dependency in evaluation_order([name])
+        if "graph" in get_node(dependency).dependencies and not get_node(dependency).cheap
+    )
+
+
+def search_plan(conjectures):
+    """
+    Returns the order in which check_graph tests conjectures on a graph: a list of pairs
+    (hypothesis, indices) with the indices of the conjectures under each hypothesis.
+
+    Hypotheses come cheapest first, so that a graph failing a cheap hypothesis costs nothing
+    more, and within a hypothesis the conjectures come in the order of the cost of their two
+    invariants, so that the cheapest violations are found first.
+    """
+    groups = {}
+    for i, conjecture in enumerate(conjectures):
+        groups.setdefault(conjecture.hypothesis.statement, []).append(i)
+    plan = []
+    for statement, indices in groups.items():
+        indices.sort(key=lambda i: evaluation_cost(conjectures[i].conclusion.lhs) + evaluation_cost(conjectures[i].conclusion.rhs))
+        plan.append((statement, indices))
+    plan.sort(key=lambda group: evaluation_cost(group[0]))
+    return plan
+
+
+def _violates(conclusion, lhs, rhs, tolerance):
+    """
+    Returns True if the values lhs and rhs break the conclusion, with the tolerance of
+    evaluate_conjectures.
+    """
+    bound = float(conclusion.slope) * rhs + float(conclusion.intercept)
+    slack = bound - lhs if conclusion.inequality == "<=" else lhs - bound
+    return slack < -tolerance * (1.0 + abs(bound))
+
+
+def check_graph(G, conjectures, plan, pending=None, tolerance=1e-9, errors=None):
+    """
+    Returns the conjectures a graph is a counterexample to.
+
+    Only the hypotheses and invariants of the given conjectures are computed, all through one
+    EvaluationContext, so a value shared by several conjectures is computed once and a
+    hypothesis stops at its first false condition. A conjecture whose hypothesis is false for
+    the graph is skipped without computing its invariants. A conjecture whose hypothesis or
+    invariants cannot be computed for the graph, e.g., because of a division by zero, is
+    skipped as well, without losing the results of the other conjectures.
+
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+    conjectures : list
+        The LinearConjecture objects.
+    plan : list
+        The search_plan of the conjectures.
+    pending : set
+        The indices of the conjectures to check. If None, every conjecture is checked.
+    tolerance : float
+        The relative and absolute tolerance of the test, see evaluate_conjectures.
+    errors : list
+        If given, a pair (index, traceback) is appended to it for every conjecture that was
+        skipped because of an error.
+
+    Returns
+    -------
+    list
+        A list of triples (index, lhs, rhs) of the violated conjectures and the values of their
+        two invariants for G.
+    """
+    context = EvaluationContext(G)
+    violations = []
+    for statement, indices in plan:
+        if pending is not None:
+            indices = [i for i in indices if i in pending]
+        if not indices:
+            continue
+        try:
+            holds = context.value(statement)
+        except Exception:
+            if errors is not None:
+                errors.extend((i, traceback.format_exc()) for i in indices)
+            continue
+        if not holds:
+            continue
+        for i in indices:
+            conclusion = conjectures[i].conclusion
+            try:
+                lhs = plain_value(context.value(conclusion.lhs))
+                rhs = plain_value(context.value(conclusion.rhs))
+            except Exception:
+                if errors is not None:
+                    errors.append((i, traceback.format_exc()))
+                continue
+            if _violates(conclusion, lhs, rhs, tolerance):
+                violations.append((i, lhs, rhs))
+    return violations
+
+
+def _init_worker(conjectures):
+    global _conjectures
+    _conjectures = (conjectures, search_plan(conjectures))
+
+
+def _check_task(task):
+    """
+    Checks one graph in a worker process of find_counterexamples and returns
+    (position, violations, errors), where errors are the pairs (index, traceback) of the
+    conjectures that could not be checked, see check_graph.
+    """
+    position, G, pending, tolerance = task
+    conjectures, plan = _conjectures
+    errors = []
+    try:
+        violations = check_graph(G, conjectures, plan, pending, tolerance, errors)
+    except Exception:
+        return position, [], [(None, traceback.format_exc())]
+    return position, violations, errors
+
+
+def _report_errors(name, conjectures, errors):
+    """
+    Prints the errors of check_graph for the graph with the given name.
+    """
+    for i, error in errors:
+        if i is None:
+            print(f"Failed to check {name}:\n{error}")
+        else:
+            print(f"Failed to check {name} against {conjectures[i]}:\n{error}")
+
+
+def _named_graphs(graphs):
+    """
+    Yields (name, graph) for a stream of graphs or of (name, graph) pairs, naming unnamed graphs
+    by their position in the stream.
+    """
+    for position, item in enumerate(graphs):
+        if isinstance(item, tuple):
+            yield item
+        else:
+            yield f"G{position}", item
+
+
+def find_counterexamples(conjectures, graphs, workers=1, tolerance=1e-9):
+    """
+    Searches a stream of graphs for counterexamples to linear conjectures.
+
+    Every graph is checked with check_graph against the conjectures that have no
+    counterexample yet, computing only the invariants and properties those conjectures use,
+    cheap hypotheses first. A conjecture that cannot be computed for a graph is reported and
+    skipped for that graph only. A conjecture is dropped from the search at its first
+    counterexample, and the search stops reading the stream once every conjecture has one, so
+    the stream may be an endless generator of random graphs.
+
+    With more than one worker the graphs are checked in a process pool, a few graphs per worker
+    at a time. A graph is only sent with the conjectures still open when it is sent, so a
+    conjecture can be refuted by a few graphs checked at the same time; the first of them in
+    the stream is kept.
+
+    Parameters
+    ----------
+    conjectures : list
+        The LinearConjecture objects.
+    graphs : iterable
+        The NetworkX graphs, or (name, graph) pairs, e.g., from read_graph6.
+    workers : int
+        The number of worker processes. If None, the number of CPUs is used.
+    tolerance : float
+        The relative and absolute tolerance of the test, see evaluate_conjectures.
+
+    Returns
+    -------
+    dict
+        A dictionary from every refuted conjecture to a dictionary with the "name" and the
+        "graph" of its first counterexample and the values of its two invariants.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.counterexamples import find_counterexamples
+    >>> import grinpy as gp
+    >>> graphs = (gp.gnp_random_graph(10, 0.3, seed=seed) for seed in range(1000))
+    >>> counterexamples = find_counterexamples(conjectures, graphs, workers=4)
+    """
+    conjectures = list(conjectures)
+    pending = set(range(len(conjectures)))
+    found = {}
+    named = {}
+
+    def record(position, violations):
+        name, G = named[position]
+        for i, lhs, rhs in violations:
+            if i in found and found[i][0] < position:
+                continue
+            conclusion = conjectures[i].conclusion
+            found[i] = (position, {"name": name, "graph": G, conclusion.lhs: lhs, conclusion.rhs: rhs})
+            pending.discard(i)
+
+    stream = _named_graphs(graphs)
+    if pending and workers == 1:
+        plan = search_plan(conjectures)
+        for position, (name, G) in enumerate(stream):
+            named[position] = (name, G)
+            errors = []
+            try:
+                record(position, check_graph(G, conjectures, plan, pending, tolerance, errors))
+            except Exception:
+                errors.append((None, traceback.format_exc()))
+            _report_errors(name, conjectures, errors)
+            del named[position]
+            if not pending:
+                break
+    elif pending:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(conjectures,)) as executor:
+            running = set()
+            position = 0
+            while pending:
+                for name, G in stream:
+                    named[position] = (name, G)
+                    running.add(executor.submit(_check_task, (position, G, set(pending), tolerance)))
+                    position += 1
+                    if len(running) >= 4 * workers:
+                        break
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished, violations, errors = future.result()
+                    _report_errors(named[finished][0], conjectures, errors)
+                    record(finished, violations)
+                    del named[finished]
+            for future in running:
+                future.cancel()
+
+    return {conjectures[i]: counterexample for i, (position, counterexample) in sorted(found.items())}
+
+
+def read_graph6(lines):
+    """
+    Yields (name, graph) for the graph6 lines of a file or a stream, e.g., the output of nauty's
+    geng, skipping empty lines and headers. The graphs are named by their line number.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.counterexamples import find_counterexamples, read_graph6
+    >>> import subprocess
+    >>> geng = subprocess.Popen(["geng", "-c", "8"], stdout=subprocess.PIPE, text=True)
+    >>> counterexamples = find_counterexamples(conjectures, read_graph6(geng.stdout), workers=4)
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith(">>"):
+            continue
+        yield f"graph6_{number}", gp.from_graph6_bytes(line.encode())
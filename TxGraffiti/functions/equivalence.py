@@ -0,0 +1,132 @@
+from fractions import Fraction
+import hashlib
+import numpy as np
+
+__all__ = ["affine_form", "column_classes", "property_classes"]
+
+# Integer-valued float columns below this bound are converted to int64 exactly.
+_FLOAT_INTEGER_BOUND = 2**53
+
+
+def _digest(array):
+    """
+    Returns a short hash of the bytes of an array.
+    """
+    return hashlib.blake2b(np.ascontiguousarray(array).tobytes(), digest_size=16).digest()
+
+
+def affine_form(values):
+    """
+    Returns a key and the positive affine map of a column onto the normal form of its class.
+
+    An integer-valued column u is written as u = slope * n + offset, where offset is the
+    minimum of u and n is the integer column (u - offset) / slope with slope the gcd of
+    u - offset, so that n has minimum 0 and gcd 1. Two integer-valued columns with the same n
+    are positive affine images of each other, e.g., vertex_cover_number and
+    (order - independence_number), which are equal, or order and (order + 1). Any other column,
+    e.g., one of ratios or of real values, is only matched with columns holding exactly the
+    same values, with slope 1 and offset 0.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The values of the column.
+
+    Returns
+    -------
+    tuple
+        A triple (key, slope, offset), where columns with equal keys have the same normal form n
+        and the column is slope * n + offset, with slope and offset Fractions.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.equivalence import affine_form
+    >>> import numpy as np
+    >>> affine_form(np.array([3, 5, 9]))[1:]
+    (Fraction(2, 1), Fraction(3, 1))
+    >>> affine_form(np.array([1, 2, 4]))[0] == affine_form(np.array([3, 5, 9]))[0]
+    True
+    """
+    values = np.asarray(values)
+    integral = values.dtype.kind in "iub"
+    if values.dtype.kind == "f" and np.all(np.isfinite(values)):
+        integral = bool(np.all(values == np.rint(values)) and np.all(np.abs(values) < _FLOAT_INTEGER_BOUND))
+    if not integral:
+        return ("exact", values.dtype.str, _digest(values)), Fraction(1), Fraction(0)
+
+    u = values.astype(np.int64)
+    if len(u) == 0:
+        return ("affine", _digest(u)), Fraction(1), Fraction(0)
+    offset = int(u.min())
+    shifted = u - offset
+    slope = int(np.gcd.reduce(shifted)) or 1
+    return ("affine", _digest(shifted // slope)), Fraction(slope), Fraction(offset)
+
+
+def column_classes(masks, names):
+    """
+    Returns the classes of identical or positive affine-equivalent columns.
+
+    Bounds of one column in terms of another only need to be solved once per pair of classes:
+    if x = a*X + c and y = d*Y + e with a, d > 0, the convex hull, and with it the optimal
+    linear bounds, of the points (x, y) is the image of the hull of the points (X, Y), and the
+    bound y <= m*x + b is the image of Y <= (m*a/d)*X + (m*c + b - e)/d.
+
+    Parameters
+    ----------
+    masks : HypothesisMasks
+        The hypothesis masks of the data, whose cached columns and affine forms are used.
+    names : list of strings
+        The names of the columns.
+
+    Returns
+    -------
+    dict
+        A dictionary from every name to a triple (representative, slope, offset) with the column
+        equal to slope * representative + offset. The representative of a class is its first
+        column in names, with slope 1 and offset 0.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.equivalence import column_classes
+    >>> from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> column_classes(HypothesisMasks(df), ["vertex_cover_number", "order", "(order - independence_number)"])
+    """
+    representatives = {}
+    classes = {}
+    for name in names:
+        if name in classes:
+            continue
+        key, slope, offset = masks.affine_form(name)
+        if key in representatives:
+            representative, rep_slope, rep_offset = representatives[key]
+            ratio = slope / rep_slope
+            classes[name] = (representative, ratio, offset - ratio * rep_offset)
+        else:
+            representatives[key] = (name, slope, offset)
+            classes[name] = (name, Fraction(1), Fraction(0))
+    return classes
+
+
+def property_classes(masks, properties):
+    """
+    Returns a dictionary from every property to the first property in properties that selects
+    exactly the same objects, e.g., "a connected and cubic graph" and "a connected and cubic
+    graph which is not K_4" on a dataset without K_4.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.equivalence import property_classes
+    >>> from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> property_classes(HypothesisMasks(df), ["a connected graph", "a connected graph which is not K_n"])
+    """
+    representatives = {}
+    classes = {}
+    for prop in properties:
+        key = masks.bits(prop).tobytes()
+        classes[prop] = representatives.setdefault(key, prop)
+    return classes
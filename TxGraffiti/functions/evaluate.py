@@ -0,0 +1,176 @@
+from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+import os
+import weakref
+import numpy as np
+
+__all__ = ["NameIndex", "name_index", "evaluate_conjectures"]
+
+# The name indexes of the dataframes seen by name_index, by id, with the names they were built
+# from, dropped with their dataframes.
+_indexes = {}
+
+
+def _stem(name):
+    return os.path.splitext(name)[0]
+
+
+class NameIndex:
+    """
+    A dictionary from the names of the objects of a dataframe to their row positions.
+
+    Names are matched as strings, and a name also matches the object whose name has an added or
+    a removed file extension, e.g., "G10" finds the row named "G10.txt" and "G10.txt" finds the
+    row named "G10", so lookups do not depend on how the dataset was built. A stem shared by
+    several objects is only matched exactly.
+
+    Attributes
+    ----------
+    names : list of strings
+        The names of the objects, in row order.
+
+    Methods
+    -------
+    row(name):
+        Returns the row position of the object with the given name, or raises a KeyError.
+    rows(names):
+        Returns the row positions of the objects with the given names as an array.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.evaluate import NameIndex
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> index = NameIndex(df)
+    >>> index.row("MathematicaGraph7570") == index.row("MathematicaGraph7570.txt")
+    True
+    """
+    def __init__(self, df, column="name"):
+        self.names = [str(name) for name in df[column]]
+        self._rows = {}
+        stems = {}
+        for row, name in enumerate(self.names):
+            self._rows.setdefault(name, row)
+            stems.setdefault(_stem(name), []).append(row)
+        for stem, rows in stems.items():
+            if len(rows) == 1:
+                self._rows.setdefault(stem, rows[0])
+
+    def row(self, name):
+        name = str(name)
+        if name in self._rows:
+            return self._rows[name]
+        if _stem(name) in self._rows:
+            return self._rows[_stem(name)]
+        raise KeyError(f"Unknown object {name}")
+
+    def rows(self, names):
+        return np.array([self.row(name) for name in names], dtype=np.int64)
+
+    def __contains__(self, name):
+        try:
+            self.row(name)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.names)
+
+
+def name_index(df, column="name"):
+    """
+    Returns the NameIndex of a dataframe, built once and reused while the dataframe keeps the
+    same names. The whole name column is compared with the names the index was built from on
+    every call, which is a vectorized comparison, far cheaper than rebuilding the index.
+    """
+    ref, names, index = _indexes.get(id(df), (None, None, None))
+    if ref is None or ref() is not df:
+        index = None
+        weakref.finalize(df, _indexes.pop, id(df), None)
+    current = df[column].to_numpy()
+    if index is None or len(names) != len(current) or not np.array_equal(names, current):
+        index = NameIndex(df, column)
+        _indexes[id(df)] = (weakref.ref(df), current.copy(), index)
+    return index
+
+
+def evaluate_conjectures(conjectures, df, names=None, masks=None, tolerance=1e-9):
+    """
+    Evaluates linear conjectures on the objects of a dataframe in one vectorized pass.
+
+    The columns and hypotheses used by the conjectures are gathered once into arrays, and the
+    slack of every conjecture on every object is computed from them at once: for an upper bound
+    lhs <= slope*rhs + intercept it is slope*rhs + intercept - lhs, for a lower bound
+    lhs >= slope*rhs + intercept it is lhs - slope*rhs - intercept, so that a conjecture holds
+    on an object exactly when its slack is not negative. As in touch_mask, a slack that is
+    negative by no more than the tolerance, relative to the bound, is a rounding error of an
+    equality and counts as holding.
+
+    Parameters
+    ----------
+    conjectures : list
+        The LinearConjecture objects.
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    names : list of strings
+        The names of the objects to evaluate, looked up with a NameIndex. If None, every row of
+        df is evaluated, in row order.
+    masks : HypothesisMasks
+        The hypothesis masks of df, e.g., kept from the search. If None, they are built.
+    tolerance : float
+        The relative and absolute tolerance of the test.
+
+    Returns
+    -------
+    tuple
+        A pair (truth, slack) of arrays of shape (len(conjectures), number of objects). truth
+        is True where the conjecture holds, including every object outside its hypothesis,
+        unlike LinearConjecture.__call__, which is False there. slack is a float array that is
+        NaN for the objects outside the hypothesis.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.evaluate import evaluate_conjectures
+    >>> from TxGraffiti.functions.make_inequalities import write_on_the_wall
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> conjectures = write_on_the_wall(df, ["domination_number"], ["order", "size"], ["a connected graph"])
+    >>> truth, slack = evaluate_conjectures(conjectures, df)
+    >>> bool(truth.all())
+    True
+    """
+    if masks is None:
+        masks = HypothesisMasks(df)
+    rows = None if names is None else name_index(df).rows(names)
+    objects = masks.rows if rows is None else len(rows)
+
+    columns = {}
+    hypotheses = {}
+    for conjecture in conjectures:
+        conclusion = conjecture.conclusion
+        columns.setdefault(conclusion.lhs, len(columns))
+        columns.setdefault(conclusion.rhs, len(columns))
+        hypotheses.setdefault(conjecture.hypothesis.statement, len(hypotheses))
+
+    values = np.empty((len(columns), objects), dtype=float)
+    for name, i in columns.items():
+        column = masks.column(name)
+        values[i] = column if rows is None else column[rows]
+    applies = np.empty((len(hypotheses), objects), dtype=bool)
+    for statement, i in hypotheses.items():
+        mask = masks.mask(statement)
+        applies[i] = mask if rows is None else mask[rows]
+
+    lhs = np.array([columns[conjecture.conclusion.lhs] for conjecture in conjectures], dtype=np.int64)
+    rhs = np.array([columns[conjecture.conclusion.rhs] for conjecture in conjectures], dtype=np.int64)
+    hypothesis = np.array([hypotheses[conjecture.hypothesis.statement] for conjecture in conjectures], dtype=np.int64)
+    slopes = np.array([float(conjecture.conclusion.slope) for conjecture in conjectures])
+    intercepts = np.array([float(conjecture.conclusion.intercept) for conjecture in conjectures])
+    signs = np.array([1.0 if conjecture.conclusion.inequality == "<=" else -1.0 for conjecture in conjectures])
+
+    bound = slopes[:, None] * values[rhs] + intercepts[:, None]
+    slack = signs[:, None] * (bound - values[lhs])
+    applied = applies[hypothesis]
+    truth = ~applied | (slack >= -tolerance * (1.0 + np.abs(bound)))
+    slack[~applied] = np.nan
+    return truth, slack
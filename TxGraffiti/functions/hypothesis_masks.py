@@ -0,0 +1,133 @@
+from TxGraffiti.functions.equivalence import affine_form
+from TxGraffiti.functions.touch import rational_scale
+import hashlib
+import numpy as np
+
+__all__ = ["HypothesisMasks", "popcount"]
+
+# The number of set bits of every byte.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits):
+    """
+    Returns the number of set bits in a packed uint8 bitmask.
+    """
+    return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+
+class HypothesisMasks:
+    """
+    The objects satisfying each hypothesis of a dataframe, computed once for a whole search.
+
+    Every property column is turned into a packed bitmask of the rows where it is True, together
+    with its popcount and the row indices it selects. The data of a hypothesis is then gathered
+    from cached numpy columns through those indices, instead of filtering a copy of the whole
+    dataframe for every linear program, and hypotheses are compared by their cached counts or
+    by subset tests on the bitmasks.
+
+    Attributes
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    rows : int
+        The number of rows of the dataframe.
+
+    Methods
+    -------
+    bits(hypothesis):
+        Returns the packed bitmask of the rows satisfying the hypothesis.
+    mask(hypothesis):
+        Returns the unpacked boolean mask of the rows satisfying the hypothesis.
+    count(hypothesis):
+        Returns the number of rows satisfying the hypothesis.
+    indices(hypothesis):
+        Returns the indices of the rows satisfying the hypothesis.
+    column(name):
+        Returns the values of a column as a numpy array.
+    values(name, hypothesis):
+        Returns the values of a column on the rows satisfying the hypothesis.
+    scale(name):
+        Returns the rational_scale of a column, used for exact touch counting.
+    affine_form(name):
+        Returns the affine_form of a column, used to find equivalent columns.
+    digest(name):
+        Returns a hash of the values of a column, the same for every integer dtype.
+    mask_digest(hypothesis):
+        Returns a hash of the rows satisfying the hypothesis.
+    is_subset(hypothesis, other):
+        Returns True if every row satisfying the hypothesis satisfies the other hypothesis.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> masks = HypothesisMasks(df, ["a connected graph", "a tree graph"])
+    >>> masks.count("a tree graph")
+    >>> masks.is_subset("a tree graph", "a connected graph")
+    True
+    """
+    def __init__(self, df, hypotheses=()):
+        self.df = df
+        self.rows = len(df)
+        self._bits = {}
+        self._counts = {}
+        self._indices = {}
+        self._columns = {}
+        self._scales = {}
+        self._affine_forms = {}
+        self._digests = {}
+        for hypothesis in hypotheses:
+            self.bits(hypothesis)
+
+    def bits(self, hypothesis):
+        if hypothesis not in self._bits:
+            mask = self.df[hypothesis].to_numpy() == True
+            self._bits[hypothesis] = np.packbits(mask)
+            self._indices[hypothesis] = np.flatnonzero(mask)
+            self._counts[hypothesis] = popcount(self._bits[hypothesis])
+        return self._bits[hypothesis]
+
+    def mask(self, hypothesis):
+        return np.unpackbits(self.bits(hypothesis), count=self.rows).astype(bool)
+
+    def count(self, hypothesis):
+        self.bits(hypothesis)
+        return self._counts[hypothesis]
+
+    def indices(self, hypothesis):
+        self.bits(hypothesis)
+        return self._indices[hypothesis]
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = self.df[name].to_numpy()
+        return self._columns[name]
+
+    def values(self, name, hypothesis):
+        return self.column(name)[self.indices(hypothesis)]
+
+    def scale(self, name):
+        if name not in self._scales:
+            self._scales[name] = rational_scale(self.column(name))
+        return self._scales[name]
+
+    def affine_form(self, name):
+        if name not in self._affine_forms:
+            self._affine_forms[name] = affine_form(self.column(name))
+        return self._affine_forms[name]
+
+    def digest(self, name):
+        if name not in self._digests:
+            values = self.column(name)
+            values = values.astype(np.int64 if values.dtype.kind in "iub" else np.float64)
+            self._digests[name] = hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+        return self._digests[name]
+
+    def mask_digest(self, hypothesis):
+        bits = self.bits(hypothesis)
+        return hashlib.blake2b(bits.tobytes() + str(self.rows).encode(), digest_size=16).hexdigest()
+
+    def is_subset(self, hypothesis, other):
+        return not np.any(self.bits(hypothesis) & ~self.bits(other))
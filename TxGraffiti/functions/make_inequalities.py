@@ -1,14 +1,40 @@
 from TxGraffiti.classes.conjecture_class import Hypothesis, LinearConclusion, LinearConjecture
-from pulp import *
+from TxGraffiti.functions.bound_solver import linear_bounds, upper_linear_bound, lower_linear_bound
+from TxGraffiti.functions.hypothesis_masks import HypothesisMasks
+from TxGraffiti.functions.prescreen import screen_bounds
+from TxGraffiti.functions.batch_bounds import batch_linear_bounds, iter_linear_bounds_all, conjectures_from_table
+from TxGraffiti.functions.touch import touch_count
+import heapq
 import numpy as np
 from fractions import Fraction
 
+def _make_linear_conjecture(X, Y, target, inequality, w, other, b, hyp, symbol, scales=None):
+    """
+    Returns the LinearConjecture for the solution (w, b) of a bound of Y in terms of X, where
+    scales are the rational scales of the columns of X and Y, see touch_count.
+    """
+
+    # Extract the solution.
+    m = Fraction(w).limit_denominator(10)
+    b = Fraction(b).limit_denominator(10)
+
+    # Compute the number of instances of equality.
+    touch = touch_count(X, Y, m, b, scales)
+
+    # Create the hypothesis and conclusion objects.
+    hypothesis = Hypothesis(hyp)
+    conclusion = LinearConclusion(target, inequality, m, other, b)
+
+    return LinearConjecture(hypothesis, conclusion, symbol, touch)
+
 def make_upper_linear_conjecture(
         df,
         target,
         other,
         hyp = "is_connected",
         symbol = "G",
+        solver = "hull",
+        masks = None,
     ):
     """
     Returns a LinearConjecture object with the given hypothesis, target, and other variables. The
@@ -26,6 +52,10 @@ def make_upper_linear_conjecture(
         The name of the hypothesis variable.
     symbol : string
         The symbol of the object in the conjecture.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LP with PuLP.
+    masks : HypothesisMasks
+        The hypothesis masks of df, shared across calls. If None, they are built for hyp.
 
     Returns
     -------
@@ -40,41 +70,17 @@ def make_upper_linear_conjecture(
     >>> make_upper_linear_conjecture(df, "zero_forcing_number", "independence_number")
     """
 
-    # Extract the data from the dataframe.
-    df = df[df[hyp] == True]
-    X = df[other].to_numpy()
-    Y = df[target].to_numpy()
-
-    # Initialize the LP, say "prob".
-    prob = LpProblem("Test_Problem", LpMinimize)
-
-    # Initialize the variables for the LP.
-    w = LpVariable("w")
-    b = LpVariable("b")
-
-    # Define the objective function.
-    prob += np.sum(X*w + b - Y)
-
-    # Define the LP constraints.
-    for x, y in zip(X, Y):
-        prob += w*x + b - y >= 0
-        # prob += w*x - b >= 1
+    # Extract the data of the objects satisfying the hypothesis.
+    if masks is None:
+        masks = HypothesisMasks(df, [hyp])
+    X = masks.values(other, hyp)
+    Y = masks.values(target, hyp)
 
     # Solve the LP.
-    prob.solve()
-
-    # Extract the solution.
-    m = Fraction(w.varValue).limit_denominator(10)
-    b = Fraction(b.varValue).limit_denominator(10)
-
-    # Compute the number of instances of equality.
-    touch = np.sum(Y == m*X + b)
+    w, b = upper_linear_bound(X, Y, solver)
 
-    # Create the hypothesis and conclusion objects.
-    hypothesis = Hypothesis(hyp)
-    conclusion = LinearConclusion(target, "<=", m, other, b)
-
-    return LinearConjecture(hypothesis, conclusion, symbol, touch)
+    scales = (masks.scale(other), masks.scale(target))
+    return _make_linear_conjecture(X, Y, target, "<=", w, other, b, hyp, symbol, scales)
 
 def make_lower_linear_conjecture(
         df,
@@ -82,6 +88,8 @@ def make_lower_linear_conjecture(
         other,
         hyp = "is_connected",
         symbol = "G",
+        solver = "hull",
+        masks = None,
     ):
     """
     Returns a LinearConjecture object with the given hypothesis, target, and other variables. The
@@ -99,6 +107,10 @@ def make_lower_linear_conjecture(
         The name of the hypothesis variable.
     symbol : string
         The symbol of the object in the conjecture.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LP with PuLP.
+    masks : HypothesisMasks
+        The hypothesis masks of df, shared across calls. If None, they are built for hyp.
 
     Returns
     -------
@@ -113,42 +125,87 @@ def make_lower_linear_conjecture(
     >>> make_lower_linear_conjecture(df, "zero_forcing_number", "independence_number")
     """
 
-    # Extract the data from the dataframe.
-    df = df[df[hyp] == True]
-    X = df[other].to_numpy()
-    Y = df[target].to_numpy()
+    # Extract the data of the objects satisfying the hypothesis.
+    if masks is None:
+        masks = HypothesisMasks(df, [hyp])
+    X = masks.values(other, hyp)
+    Y = masks.values(target, hyp)
 
-    # Initialize the LP, say "prob".
-    prob = LpProblem("Test_Problem", LpMaximize)
+    # Solve the LP.
+    w, b = lower_linear_bound(X, Y, solver)
 
-    # Initialize the variables for the LP.
-    w = LpVariable("w")
-    b = LpVariable("b")
+    scales = (masks.scale(other), masks.scale(target))
+    return _make_linear_conjecture(X, Y, target, ">=", w, other, b, hyp, symbol, scales)
 
-    # Define the objective function.
-    prob += np.sum(X*w + b - Y)
+def make_linear_conjectures(
+        df,
+        target,
+        other,
+        hyp = "is_connected",
+        symbol = "G",
+        masks = None,
+    ):
+    """
+    Returns the upper and the lower LinearConjecture objects with the given hypothesis, target,
+    and other variables. Both conclusions are read off of a single convex hull of the data, so
+    this is cheaper than calling make_upper_linear_conjecture and make_lower_linear_conjecture.
 
-    # Define the LP constraints.
-    for x, y in zip(X, Y):
-        prob += w*x + b - y <= 0
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    target : string
+        The name of the target variable.
+    other : string
+        The name of the other variable.
+    hyp : string
+        The name of the hypothesis variable.
+    symbol : string
+        The symbol of the object in the conjecture.
+    masks : HypothesisMasks
+        The hypothesis masks of df, shared across calls. If None, they are built for hyp.
 
-    # Solve the LP.
-    prob.solve()
+    Returns
+    -------
+    tuple of LinearConjecture
+        The upper and the lower conjecture with the given hypothesis, target, and other variables.
 
-    # Extract the solution.
-    m = Fraction(w.varValue).limit_denominator(10)
-    b = Fraction(b.varValue).limit_denominator(10)
+    Examples
+    --------
+    >>> from TxGraffiti.functions.make_inequalities import make_linear_conjectures
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/connected_graphs.csv")
+    >>> upper, lower = make_linear_conjectures(df, "zero_forcing_number", "independence_number")
+    """
 
-    # Compute the number of instances of equality.
-    touch = np.sum(Y == m*X + b)
+    # Extract the data of the objects satisfying the hypothesis.
+    if masks is None:
+        masks = HypothesisMasks(df, [hyp])
+    X = masks.values(other, hyp)
+    Y = masks.values(target, hyp)
 
-    # Create the hypothesis and conclusion objects.
-    hypothesis = Hypothesis(hyp)
-    conclusion = LinearConclusion(target, ">=", m, other, b)
+    # Solve both LPs.
+    (w_upper, b_upper), (w_lower, b_lower) = linear_bounds(X, Y)
 
-    return LinearConjecture(hypothesis, conclusion, symbol, touch)
+    scales = (masks.scale(other), masks.scale(target))
+    return (
+        _make_linear_conjecture(X, Y, target, "<=", w_upper, other, b_upper, hyp, symbol, scales),
+        _make_linear_conjecture(X, Y, target, ">=", w_lower, other, b_lower, hyp, symbol, scales),
+    )
 
-def make_all_upper_linear_conjectures(df, target, others, properties):
+def _solve_bound(masks, target, other, hyp, direction, prescreen, report):
+    """
+    Returns True if the bound of target in terms of other under hyp has to be solved, where
+    direction is 0 for the upper and 1 for the lower bound, and counts it in the report.
+    """
+    reason = None
+    if prescreen:
+        reason = screen_bounds(masks.values(other, hyp), masks.values(target, hyp))[direction]
+    if report is not None:
+        report.add(reason)
+    return reason is None
+
+def make_all_upper_linear_conjectures(df, target, others, properties, solver="hull", masks=None, prescreen=False, report=None):
     """
     Returns a list of LinearConjecture objects with the given target variable and other variables.
 
@@ -162,6 +219,15 @@ def make_all_upper_linear_conjectures(df, target, others, properties):
         The names of the other variables.
     properties : list of strings
         The names of the hypothesis variables.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LP with PuLP.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built for the given properties.
+    prescreen : bool
+        Whether to skip, without solving, the bounds that screen_bounds shows cannot survive
+        filter_conjectures. Only for the hull solver; with PuLP a ValueError is raised.
+    report : ScreenReport
+        If given, the solved and skipped bounds are counted in it.
 
     Returns
     -------
@@ -175,10 +241,15 @@ def make_all_upper_linear_conjectures(df, target, others, properties):
     >>> df = pd.read_csv("math_data/data/connected_graphs.csv")
     >>> make_all_upper_linear_conjectures(df, "zero_forcing_number", ["independence_number", "order"], ["is_connected", "is_regular"])
     """
-    return [make_upper_linear_conjecture(df, target, other, hyp = prop)
-            for other in others for prop in properties if other != target]
-
-def make_all_lower_linear_conjectures(df, target, others, properties):
+    if prescreen and solver != "hull":
+        raise ValueError("Pre-screening relies on the hull solver and cannot be used with PuLP.")
+    if masks is None:
+        masks = HypothesisMasks(df, properties)
+    return [make_upper_linear_conjecture(df, target, other, hyp = prop, solver = solver, masks = masks)
+            for other in others for prop in properties
+            if other != target and _solve_bound(masks, target, other, prop, 0, prescreen, report)]
+
+def make_all_lower_linear_conjectures(df, target, others, properties, solver="hull", masks=None, prescreen=False, report=None):
     """
     Returns a list of LinearConjecture objects with the given target variable and other variables.
 
@@ -192,6 +263,15 @@ def make_all_lower_linear_conjectures(df, target, others, properties):
         The names of the other variables.
     properties : list of strings
         The names of the hypothesis variables.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LP with PuLP.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built for the given properties.
+    prescreen : bool
+        Whether to skip, without solving, the bounds that screen_bounds shows cannot survive
+        filter_conjectures. Only for the hull solver; with PuLP a ValueError is raised.
+    report : ScreenReport
+        If given, the solved and skipped bounds are counted in it.
 
     Returns
     -------
@@ -205,10 +285,54 @@ def make_all_lower_linear_conjectures(df, target, others, properties):
     >>> df = pd.read_csv("math_data/data/connected_graphs.csv")
     >>> make_all_lower_linear_conjectures(df, "zero_forcing_number", ["independence_number", "order"], ["is_connected", "is_regular"])
     """
-    return [make_lower_linear_conjecture(df, target, other, hyp = prop)
-              for other in others for prop in properties if other != target]
+    if prescreen and solver != "hull":
+        raise ValueError("Pre-screening relies on the hull solver and cannot be used with PuLP.")
+    if masks is None:
+        masks = HypothesisMasks(df, properties)
+    return [make_lower_linear_conjecture(df, target, other, hyp = prop, solver = solver, masks = masks)
+              for other in others for prop in properties
+              if other != target and _solve_bound(masks, target, other, prop, 1, prescreen, report)]
+
+def make_all_linear_conjectures(df, target, others, properties, masks=None, prescreen=False):
+    """
+    Returns the lists of upper and lower LinearConjecture objects with the given target variable
+    and other variables, solving both directions from one convex hull per pair with the batched
+    engine batch_linear_bounds.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    target : string
+        The name of the target variable.
+    others : list of strings
+        The names of the other variables.
+    properties : list of strings
+        The names of the hypothesis variables.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built for the given properties.
+    prescreen : bool
+        Whether to skip, without solving, the bounds that screen_bounds shows cannot survive
+        filter_conjectures.
+
+    Returns
+    -------
+    tuple of lists of LinearConjecture
+        The upper and the lower conjectures with the given target variable and other variables,
+        in the same order as make_all_upper_linear_conjectures and
+        make_all_lower_linear_conjectures.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.make_inequalities import make_all_linear_conjectures
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/connected_graphs.csv")
+    >>> upper, lower = make_all_linear_conjectures(df, "zero_forcing_number", ["independence_number", "order"], ["is_connected", "is_regular"])
+    """
+    table = batch_linear_bounds(df, target, others, properties, masks, prescreen)
+    return conjectures_from_table(table)
 
-def filter_conjectures(df, conjectures):
+def filter_conjectures(df, conjectures, masks=None):
     """
     Returns a list of conjectures with the same conclusion, but with the hypothesis that has the
     most instances of equality.
@@ -219,6 +343,9 @@ def filter_conjectures(df, conjectures):
         The dataframe containing the data.
     conjectures : list of LinearConjecture
         The list of conjectures to be filtered.
+    masks : HypothesisMasks
+        The hypothesis masks of df, whose cached counts measure how general a hypothesis is.
+        If None, they are built from the hypotheses of the conjectures.
 
     Returns
     -------
@@ -237,13 +364,23 @@ def filter_conjectures(df, conjectures):
     """
     conjectures = [conj for conj in conjectures if conj.touch > 0 and conj.conclusion.slope > 0]
     conjectures.sort(key = lambda x: x.touch, reverse=True)
-    new_conjectures = conjectures.copy()
-    for conj_one in conjectures:
-            for conj_two in new_conjectures:
-                    if conj_one.conclusion == conj_two.conclusion:
-                        if len(df[df[conj_one.hypothesis.statement] == True]) > len(df[df[conj_two.hypothesis.statement] == True]):
-                            new_conjectures.remove(conj_two)
-    return new_conjectures
+    if masks is None:
+        masks = HypothesisMasks(df)
+
+    # Find the largest number of objects satisfying a hypothesis of each conclusion.
+    counts = {}
+    most_general = {}
+    for conj in conjectures:
+        statement = conj.hypothesis.statement
+        if statement not in counts:
+            counts[statement] = masks.count(statement)
+        key = conj.conclusion.key()
+        if counts[statement] > most_general.get(key, -1):
+            most_general[key] = counts[statement]
+
+    # Keep, for each conclusion, the conjectures with a most general hypothesis.
+    return [conj for conj in conjectures
+            if counts[conj.hypothesis.statement] == most_general[conj.conclusion.key()]]
 
 def filter_known_conjectures(conjectures, known_conjectures):
     """
@@ -272,14 +409,10 @@ def filter_known_conjectures(conjectures, known_conjectures):
     >>> conjectures = make_all_upper_linear_conjectures(df, "zero_forcing_number", ["independence_number", "order"], ["is_connected", "is_regular"])
     >>> filter_known_conjectures(conjectures, known_conjectures)
     """
-    new_conjectures = conjectures.copy()
-    for conj_one in conjectures:
-            for conj_two in known_conjectures:
-                    if conj_one.conclusion == conj_two.conclusion and conj_one.hypothesis.statement == conj_two.hypothesis.statement:
-                        new_conjectures.remove(conj_one)
-    return new_conjectures
+    known = {(conj.hypothesis.statement, conj.conclusion) for conj in known_conjectures}
+    return [conj for conj in conjectures if (conj.hypothesis.statement, conj.conclusion) not in known]
 
-def dalmatian(df, conjectures):
+def dalmatian(df, conjectures, masks=None):
     """
     Returns a list of conjectures with the same conclusion, but with the hypothesis that has the
     most instances of equality. This is used to filter out conjectures that are already known.
@@ -290,6 +423,9 @@ def dalmatian(df, conjectures):
         The dataframe containing the data.
     conjectures : list of LinearConjecture
         The list of conjectures to be filtered.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built from the hypotheses of the
+        conjectures.
 
     Returns
     -------
@@ -306,16 +442,27 @@ def dalmatian(df, conjectures):
     >>> conjectures = make_all_upper_linear_conjectures(df, "zero_forcing_number", ["independence_number", "order"], ["is_connected", "is_regular"])
     >>> dalmation(df, conjectures)
     """
-    conj = conjectures[0]
-    new_conjectures = [conj]
-    sharps = set(conj.get_sharp_graphs(df).index)
-    for conj in conjectures[1:]:
-        if set(conj.get_sharp_graphs(df).index) - sharps != set():
+    if not conjectures:
+        return []
+    if masks is None:
+        masks = HypothesisMasks(df)
+
+    # The sharp objects of every conjecture, as packed bitmasks, and all objects that are sharp
+    # for at least one conjecture.
+    sharps = [conj.get_sharp_bits(masks) for conj in conjectures]
+    possible = np.bitwise_or.reduce(sharps)
+
+    new_conjectures = [conjectures[0]]
+    covered = sharps[0].copy()
+    for conj, sharp in zip(conjectures[1:], sharps[1:]):
+        if np.array_equal(covered, possible):
+            break
+        if np.any(sharp & ~covered):
             new_conjectures.append(conj)
-            sharps = sharps.union(conj.get_sharp_graphs(df).index)
+            covered |= sharp
     return new_conjectures
 
-def write_on_the_wall(df, targets, invariant_names, property_names, use_dalmation=True):
+def write_on_the_wall(df, targets, invariant_names, property_names, use_dalmation=True, solver="hull", workers=1, prescreen=None, report=None, cache=None, masks=None):
     """
     Returns a list of conjectures with the same conclusion, but with the hypothesis that has the
     most instances of equality. This is used to filter out conjectures that are already known.
@@ -325,13 +472,37 @@ def write_on_the_wall(df, targets, invariant_names, property_names, use_dalmatio
     df : pandas.DataFrame
         The dataframe containing the data.
     targets : list of str
-        The list of targets.
+        The list of targets. If None, every invariant is a target, and the bounds of all
+        targets are computed together with iter_linear_bounds_all, which shares the work of
+        each pair of invariants between both of its targets.
     invariant_names : list of str
         The list of invariant names.
     property_names : list of str
         The list of property names.
     use_dalmation : bool
         Whether or not to use dalmation.
+    solver : string
+        Either "hull" for the exact in-process solver or "pulp" to solve the LPs with PuLP.
+    workers : int
+        The number of worker processes for the bounds of the targets. If None, the number of
+        CPUs is used.
+    prescreen : bool
+        Whether to skip, without solving, the bounds that screen_bounds shows cannot survive
+        filter_conjectures, such as bounds under hypotheses with fewer than two objects, of
+        constant columns, or with a non-positive slope. Dalmatian runs before
+        filter_conjectures, so a skipped bound could have claimed sharp graphs and changed the
+        conjectures Dalmatian keeps; if None, bounds are only pre-screened when Dalmatian is
+        off, so that the result never changes. Pre-screening relies on the tie-breaks of the
+        hull solver, so with solver="pulp" it is off by default and raises a ValueError if
+        requested.
+    report : ScreenReport
+        If given, the solved and skipped bounds are counted in it.
+    cache : BoundCache
+        If given, the bounds of the hull solver are read from and stored in this cache, so
+        that repeated and overlapping runs only solve the bounds they have not seen before.
+    masks : HypothesisMasks
+        The hypothesis masks of df, e.g., kept from earlier calls. If None, they are built for
+        the given properties.
 
     Returns
     -------
@@ -347,12 +518,151 @@ def write_on_the_wall(df, targets, invariant_names, property_names, use_dalmatio
     >>> df = pd.read_csv("math_data/data/connected_graphs.csv")
     >>> write_on_the_wall(df, ["zero_forcing_number"], ["independence_number", "order"], ["is_connected", "is_regular"])
     """
+    if masks is None:
+        masks = HypothesisMasks(df, property_names)
     conjectures = []
-    for target in targets:
-        upper_conjectures = make_all_upper_linear_conjectures(df, target, invariant_names, property_names)
-        lower_conjectures = make_all_lower_linear_conjectures(df, target, invariant_names, property_names)
-        if use_dalmation:
-            conjectures += dalmatian(df, upper_conjectures + lower_conjectures)
+    for target, target_conjectures in conjectures_by_target(
+        df, targets, invariant_names, property_names, use_dalmation, solver, workers, prescreen, report, cache, masks
+    ):
+        conjectures += target_conjectures
+    return filter_conjectures(df, conjectures, masks)
+
+def conjectures_by_target(df, targets, invariant_names, property_names, use_dalmation=True, solver="hull", workers=1, prescreen=None, report=None, cache=None, masks=None):
+    """
+    Yields (target, conjectures) for every target, in the order of the targets, as soon as the
+    bounds of the target are solved, with the conjectures write_on_the_wall finds for it
+    sorted by touch number.
+
+    The bounds of all targets are computed together with iter_linear_bounds_all, so the work
+    of each pair of invariants is still shared between both of its targets and, with more than
+    one worker, one process pool serves every target. Since filter_conjectures only compares
+    conjectures with the same conclusion, and so with the same target, the conjectures of all
+    targets together are those of write_on_the_wall. The parameters are those of
+    write_on_the_wall.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.make_inequalities import conjectures_by_target
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> for target, conjectures in conjectures_by_target(df, None, ["order", "size", "domination_number"], ["a connected graph"]):
+    ...     print(target, len(conjectures))
+    """
+    if targets is None:
+        targets = invariant_names
+    targets = list(targets)
+    if prescreen is None:
+        prescreen = not use_dalmation and solver == "hull"
+    if prescreen and solver != "hull":
+        raise ValueError("Pre-screening relies on the hull solver and cannot be used with PuLP.")
+    if masks is None:
+        masks = HypothesisMasks(df, property_names)
+    if solver == "hull" and (len(targets) > 1 or workers != 1):
+        tables = iter_linear_bounds_all(df, targets, invariant_names, property_names, masks, workers, prescreen, cache)
+    elif solver == "hull":
+        tables = ((target, batch_linear_bounds(df, target, invariant_names, property_names, masks, prescreen, cache))
+                  for target in targets)
+    else:
+        tables = ((target, None) for target in targets)
+    for target, table in tables:
+        if table is not None:
+            if report is not None:
+                report.add_table(table)
+            upper_conjectures, lower_conjectures = conjectures_from_table(table)
         else:
-            conjectures += upper_conjectures + lower_conjectures
-    return filter_conjectures(df, conjectures)
\ No newline at end of file
+            upper_conjectures = make_all_upper_linear_conjectures(df, target, invariant_names, property_names, solver, masks, prescreen, report)
+            lower_conjectures = make_all_lower_linear_conjectures(df, target, invariant_names, property_names, solver, masks, prescreen, report)
+        conjectures = upper_conjectures + lower_conjectures
+        if use_dalmation:
+            conjectures = dalmatian(df, conjectures, masks)
+        yield target, filter_conjectures(df, conjectures, masks)
+
+def stream_conjectures(df, targets, invariant_names, property_names, use_dalmation=True, top_k=None, masks=None, prescreen=None, report=None, cache=None):
+    """
+    Yields conjectures as they are found, instead of returning them all at the end like
+    write_on_the_wall.
+
+    The bounds are computed one (target, other) pair at a time, and the conjectures of a pair
+    are yielded as soon as the pair is done, so the caller can print them right away or stop
+    early by breaking out of the loop. Only the state needed to continue is kept: the objects
+    made sharp so far for the current target, and the touch numbers of the running top k.
+
+    Since all conjectures with the same conclusion come from the same pair, filter_conjectures
+    is applied to each pair as it finishes, with the same result as at the end. Dalmatian is
+    applied greedily in the order the conjectures are found, so it may keep a different, though
+    still covering, set of conjectures than write_on_the_wall, which sees all of the upper
+    bounds of a target before its lower bounds.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the data.
+    targets : list of str
+        The list of targets. If None, every invariant is a target.
+    invariant_names : list of str
+        The list of invariant names.
+    property_names : list of str
+        The list of property names.
+    use_dalmation : bool
+        Whether or not to use dalmation.
+    top_k : int
+        If given, only conjectures whose touch number places them among the k largest found so
+        far are yielded.
+    masks : HypothesisMasks
+        The hypothesis masks of df. If None, they are built for the given properties.
+    prescreen : bool
+        Whether to skip, without solving, the bounds that screen_bounds shows cannot survive
+        filter_conjectures. If None, bounds are only pre-screened when Dalmatian is off, see
+        write_on_the_wall.
+    report : ScreenReport
+        If given, the solved and skipped bounds are counted in it.
+    cache : BoundCache
+        If given, the bounds are read from and stored in this cache of earlier runs.
+
+    Yields
+    ------
+    LinearConjecture
+        The conjectures, in the order they are found.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.make_inequalities import stream_conjectures
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> for conjecture in stream_conjectures(df, ["domination_number"], ["order", "size"], ["a connected graph"]):
+    ...     print(conjecture)
+    """
+    if targets is None:
+        targets = invariant_names
+    if prescreen is None:
+        prescreen = not use_dalmation
+    if masks is None:
+        masks = HypothesisMasks(df, property_names)
+    best = []
+    for target in targets:
+        covered = np.zeros((masks.rows + 7) // 8, dtype=np.uint8)
+        for other in invariant_names:
+            if other == target:
+                continue
+            table = batch_linear_bounds(df, target, [other], property_names, masks, prescreen, cache)
+            if report is not None:
+                report.add_table(table)
+            upper_conjectures, lower_conjectures = conjectures_from_table(table)
+            conjectures = upper_conjectures + lower_conjectures
+            if use_dalmation:
+                new_conjectures = []
+                for conj in conjectures:
+                    sharp = conj.get_sharp_bits(masks)
+                    if np.any(sharp & ~covered):
+                        new_conjectures.append(conj)
+                        covered |= sharp
+                conjectures = new_conjectures
+            for conj in filter_conjectures(df, conjectures, masks):
+                if top_k is not None:
+                    if len(best) < top_k:
+                        heapq.heappush(best, conj.touch)
+                    elif conj.touch > best[0]:
+                        heapq.heapreplace(best, conj.touch)
+                    else:
+                        continue
+                yield conj
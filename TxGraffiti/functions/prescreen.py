@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+__all__ = ["SKIP_REASONS", "screen_bounds", "ScreenReport"]
+
+# The reasons for which screen_bounds skips a bound, in the order they are checked.
+SKIP_REASONS = ["fewer than two objects", "constant column", "non-positive slope"]
+
+
+def _exceeds(total, count, value, exact):
+    """
+    Returns True if total > count * value, i.e., if the mean total / count is larger than value.
+    For float columns the difference must exceed a small relative tolerance, so that a tie is
+    never taken for a strict inequality.
+    """
+    difference = total - count * value
+    if exact:
+        return difference > 0
+    return difference > 1e-9 * max(abs(total), abs(count * value), 1.0)
+
+
+def _at_most(total, count, value, exact):
+    """
+    Returns True if total <= count * value, i.e., if the mean total / count is at most value.
+    For float columns the mean must be smaller than value by more than the tolerance of
+    _exceeds, so that a mean within rounding error of value is never taken as settled.
+    """
+    difference = total - count * value
+    if exact:
+        return difference <= 0
+    return difference < -1e-9 * max(abs(total), abs(count * value), 1.0)
+
+
+def screen_bounds(X, Y):
+    """
+    Returns, for the upper and the lower linear bound of Y in terms of X, the reason why the
+    bound cannot survive filter_conjectures, or None if it has to be solved.
+
+    filter_conjectures drops every conjecture whose slope is not positive. The optimal bound is
+    the edge of the convex hull of the points above the mean of X, so the sign of its slope is
+    known from a few reductions, without sorting or solving. They rely on the tie-breaks of the
+    hull solver, see linear_bounds, e.g., the horizontal line of a constant column, and so do
+    not hold for the bounds of the PuLP solver:
+
+    * with fewer than two objects, or a constant column, the bound is a horizontal line;
+    * the upper hull rises up to its leftmost highest point and never rises after it, so the
+      upper bound has a positive slope only if the mean of X is at most the smallest x with
+      the largest y;
+    * the lower hull falls down to its rightmost lowest point and only rises after it, so the
+      lower bound has a positive slope only if the mean of X is larger than the largest x with
+      the smallest y.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+
+    Returns
+    -------
+    tuple
+        A pair (upper_reason, lower_reason) of entries of SKIP_REASONS or None.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.prescreen import screen_bounds
+    >>> import numpy as np
+    >>> screen_bounds(np.array([1, 2, 3]), np.array([3, 2, 1]))
+    ('non-positive slope', 'non-positive slope')
+    >>> screen_bounds(np.array([1, 2, 3]), np.array([1, 2, 4]))
+    (None, None)
+    """
+    X = np.asarray(X)
+    Y = np.asarray(Y)
+    if len(X) < 2:
+        return SKIP_REASONS[0], SKIP_REASONS[0]
+    x_low, x_high = X.min(), X.max()
+    y_low, y_high = Y.min(), Y.max()
+    if x_low == x_high or y_low == y_high:
+        return SKIP_REASONS[1], SKIP_REASONS[1]
+
+    exact = X.dtype.kind in "iub"
+    total = X.sum(dtype=np.int64 if exact else np.float64)
+    count = len(X)
+    upper = lower = None
+    if _exceeds(total, count, X[Y == y_high].min(), exact):
+        upper = SKIP_REASONS[2]
+    if _at_most(total, count, X[Y == y_low].max(), exact):
+        lower = SKIP_REASONS[2]
+    return upper, lower
+
+
+class ScreenReport:
+    """
+    The number of bounds that were solved and that were skipped by screen_bounds, by reason.
+
+    Attributes
+    ----------
+    solved : int
+        The number of bounds that were solved.
+    skipped : dict
+        The number of skipped bounds of every reason in SKIP_REASONS.
+
+    Methods
+    -------
+    add(reason):
+        Counts one bound, skipped for the given reason or solved if the reason is None.
+    add_table(table):
+        Counts the bounds of a table of batch_linear_bounds.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.prescreen import ScreenReport
+    >>> from TxGraffiti.functions.make_inequalities import write_on_the_wall
+    >>> import pandas as pd
+    >>> df = pd.read_csv("math_data/data/graphs.csv")
+    >>> report = ScreenReport()
+    >>> conjectures = write_on_the_wall(df, ["domination_number"], ["order", "size"], ["a connected graph"], report=report)
+    >>> print(report)
+    """
+    def __init__(self):
+        self.solved = 0
+        self.skipped = {reason: 0 for reason in SKIP_REASONS}
+
+    def add(self, reason):
+        if reason is None:
+            self.solved += 1
+        else:
+            self.skipped[reason] += 1
+
+    def add_table(self, table):
+        for direction in ["upper", "lower"]:
+            for reason in table[f"{direction}_skip"]:
+                self.add(None if pd.isna(reason) else reason)
+
+    def __str__(self):
+        total = self.solved + sum(self.skipped.values())
+        lines = [f"Pre-screening skipped {total - self.solved} of {total} bounds:"]
+        for reason, count in self.skipped.items():
+            lines.append(f"    {count} with {reason}")
+        return "\n".join(lines)
@@ -0,0 +1,83 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+__all__ = ["SharedArrays", "attach_shared_arrays"]
+
+
+class SharedArrays:
+    """
+    A set of named numpy arrays copied into one block of shared memory, so that worker
+    processes can read them without having them pickled.
+
+    The creating process owns the block and must call close() when the workers are done. A
+    worker calls attach_shared_arrays(spec) with the picklable spec of the block to get
+    read-only views of the arrays.
+
+    Attributes
+    ----------
+    spec : tuple
+        A picklable description (block name, layout) of the block.
+    arrays : dict
+        The arrays in the block, by name.
+
+    Methods
+    -------
+    close():
+        Releases and removes the block.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.shared_arrays import SharedArrays, attach_shared_arrays
+    >>> import numpy as np
+    >>> shared = SharedArrays({"order": np.array([4, 5, 6])})
+    >>> block, arrays = attach_shared_arrays(shared.spec)
+    >>> arrays["order"]
+    array([4, 5, 6])
+    >>> shared.close()
+    """
+    def __init__(self, arrays):
+        layout = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                raise ValueError(f"The column {name} has dtype object and cannot be shared.")
+            layout.append((name, array.dtype.str, array.shape, offset))
+            # Keep every array aligned to 8 bytes.
+            offset += (array.nbytes + 7) // 8 * 8
+        self._block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.spec = (self._block.name, layout)
+        self.arrays = _views(self._block, layout)
+        for name, array in arrays.items():
+            self.arrays[name][...] = array
+
+    def close(self):
+        self.arrays = {}
+        self._block.close()
+        self._block.unlink()
+
+
+def _views(block, layout):
+    """
+    Returns the numpy views of the arrays of a layout in a shared memory block.
+    """
+    return {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+        for name, dtype, shape, offset in layout
+    }
+
+
+def attach_shared_arrays(spec):
+    """
+    Returns (block, arrays) for the spec of a SharedArrays created by another process, where
+    arrays are read-only views into the shared memory block. The block must be kept referenced
+    as long as the arrays are used.
+    """
+    name, layout = spec
+    # Worker processes share the resource tracker of the creating process, so attaching does
+    # not hand the block over to them and it stays until the creator calls close().
+    block = shared_memory.SharedMemory(name=name)
+    arrays = _views(block, layout)
+    for array in arrays.values():
+        array.flags.writeable = False
+    return block, arrays
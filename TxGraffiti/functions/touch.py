@@ -0,0 +1,140 @@
+from fractions import Fraction
+from math import lcm
+import numpy as np
+
+__all__ = ["rational_scale", "touch_mask", "touch_count"]
+
+# Integer products below this bound are computed in int64; larger ones fall back to Python ints.
+_INT64_BOUND = 2**62
+
+
+def rational_scale(values, max_denominator=1000):
+    """
+    Returns the least common denominator of a column of exact ratios, or None for a column of
+    genuinely real values.
+
+    A float column such as "[order/ max_degree]" holds ratios of small integers, each stored as
+    a float, possibly rounded further when written to a csv file. If every value agrees to
+    within a relative error of 1e-12 with a fraction with denominator at most max_denominator,
+    the column is treated as exact and the least common denominator D of those fractions is
+    returned, so that the column times D rounds to an exact integer column. Integer and boolean
+    columns have scale 1.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The values of the column.
+    max_denominator : int
+        The largest denominator of a ratio.
+
+    Returns
+    -------
+    int
+        The scale of the column, or None if the column is real-valued.
+
+    Examples
+    --------
+    >>> from TxGraffiti.functions.touch import rational_scale
+    >>> import numpy as np
+    >>> rational_scale(np.array([1/3, 2.5, 4.0]))
+    6
+    >>> rational_scale(np.array([2 ** 0.5])) is None
+    True
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return 1
+    if values.dtype.kind != "f" or not np.all(np.isfinite(values)):
+        return None
+    scale = 1
+    for value in np.unique(values):
+        ratio = Fraction(float(value)).limit_denominator(max_denominator)
+        if abs(float(ratio) - value) > 1e-12 * max(1.0, abs(value)):
+            return None
+        scale = lcm(scale, ratio.denominator)
+        if scale > _INT64_BOUND:
+            return None
+    return scale
+
+
+def _scaled_integers(values, scale):
+    """
+    Returns the values of a column times its scale as an int64 array.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return values.astype(np.int64)
+    return np.rint(values * scale).astype(np.int64)
+
+
+def touch_mask(X, Y, slope, intercept, scales=None, tolerance=1e-9):
+    """
+    Returns a boolean array marking the points (X, Y) that lie on the line
+    y = slope*x + intercept.
+
+    When both columns are integer or exact ratio columns (see rational_scale) the test is exact:
+    with x = u/Dx, y = v/Dy, slope = p/q, and intercept = r/s, the point lies on the line exactly
+    when v*q*s*Dx == p*s*Dy*u + r*q*Dx*Dy, which is evaluated in vectorized integer arithmetic.
+    When a column is real-valued the test is numpy.isclose with the given tolerance.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        The values of the other variable.
+    Y : numpy.ndarray
+        The values of the target variable.
+    slope : number
+        The slope of the line.
+    intercept : number
+        The intercept of the line.
+    scales : tuple
+        The scales (x_scale, y_scale) of the columns X and Y belong to, as returned by
+        rational_scale, with None for a real-valued column. If None, they are computed from X
+        and Y; pass the scales of the whole columns to keep the test the same on every subset.
+    tolerance : float
+        The relative and absolute tolerance used for real-valued columns.
+
+    Returns
+    -------
+    numpy.ndarray
+        The boolean array of the points on the line.
+    """
+    X = np.asarray(X)
+    Y = np.asarray(Y)
+    if scales is None:
+        scales = (rational_scale(X), rational_scale(Y))
+    x_scale, y_scale = scales
+    if x_scale is None or y_scale is None:
+        line = float(slope) * X.astype(float) + float(intercept)
+        return np.isclose(Y.astype(float), line, rtol=tolerance, atol=tolerance)
+
+    slope = Fraction(slope)
+    intercept = Fraction(intercept)
+    p, q = slope.numerator, slope.denominator
+    r, s = intercept.numerator, intercept.denominator
+    y_factor = q * s * x_scale
+    x_factor = p * s * y_scale
+    constant = r * q * x_scale * y_scale
+
+    u = _scaled_integers(X, x_scale)
+    v = _scaled_integers(Y, y_scale)
+    if len(u) == 0:
+        return np.zeros(0, dtype=bool)
+    largest = max(int(np.abs(u).max()), int(np.abs(v).max()), 1)
+    if largest * (abs(y_factor) + abs(x_factor)) + abs(constant) < _INT64_BOUND:
+        return v * y_factor == u * x_factor + constant
+    # Exact, but slower, arithmetic on Python ints for very large values.
+    u = u.astype(object)
+    v = v.astype(object)
+    return (v * y_factor == u * x_factor + constant).astype(bool)
+
+
+def touch_count(X, Y, slope, intercept, scales=None, tolerance=1e-9, counts=None):
+    """
+    Returns the number of points (X, Y) that lie on the line y = slope*x + intercept, see
+    touch_mask. If counts are given, every point counts with its multiplicity.
+    """
+    mask = touch_mask(X, Y, slope, intercept, scales, tolerance)
+    if counts is None:
+        return int(np.count_nonzero(mask))
+    return int(np.sum(np.asarray(counts)[mask]))
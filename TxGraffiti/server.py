@@ -0,0 +1,330 @@
+from TxGraffiti.cli import ConjectureWriter, check_job, open_dataset, resolve_job, run_job
+from TxGraffiti.functions.bound_cache import BoundCache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+__all__ = ["DatasetStore", "ConjectureHandler", "ConjectureServer", "make_server", "main"]
+
+# The content types of the output formats of ConjectureWriter.
+CONTENT_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _signature(name, data_dir):
+    """
+    Returns the modification times of the files a dataset is loaded from, see load_dataset,
+    with None for a missing file, so that a dataset is reloaded once any of them changes.
+    """
+    paths = [
+        os.path.join(data_dir, f"{name}.csv"),
+        os.path.join(data_dir, f"{name}.columns", "schema.json"),
+    ]
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in paths)
+
+
+class DatasetStore:
+    """
+    The datasets a server keeps in memory, each opened once with open_dataset and reopened when
+    its csv file or columnar dataset changes on disk.
+
+    Opening a dataset computes the masks of all of its properties and the columns, scales, and
+    hashes of all of its invariants, so that requests only read from the warm state and can be
+    served by several threads at once. A request keeps the dataset it started with even when
+    the dataset is reopened in the meantime.
+
+    Attributes
+    ----------
+    data_dir : string
+        The directory containing the datasets.
+    reloads : int
+        The number of times a dataset was reopened after a change.
+
+    Methods
+    -------
+    get(name):
+        Returns (df, invariants, properties, masks) of a dataset, opening or reopening it if
+        needed.
+    refresh():
+        Reopens every loaded dataset whose files changed and returns their names.
+    info():
+        Returns a dictionary describing every loaded dataset.
+
+    Examples
+    --------
+    >>> from TxGraffiti.server import DatasetStore
+    >>> store = DatasetStore()
+    >>> df, invariants, properties, masks = store.get("graphs")
+    """
+    def __init__(self, data_dir="math_data/data"):
+        self.data_dir = data_dir
+        self.reloads = 0
+        self._datasets = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _dataset_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        signature = _signature(name, self.data_dir)
+        with self._dataset_lock(name):
+            entry = self._datasets.get(name)
+            if entry is None or entry["signature"] != signature:
+                if entry is not None:
+                    self.reloads += 1
+                entry = {"signature": signature, "dataset": open_dataset(name, self.data_dir), "loaded": time.time()}
+                self._datasets[name] = entry
+            return entry["dataset"]
+
+    def refresh(self):
+        changed = [
+            name for name, entry in list(self._datasets.items())
+            if entry["signature"] != _signature(name, self.data_dir)
+        ]
+        for name in changed:
+            self.get(name)
+        return changed
+
+    def info(self):
+        info = {}
+        for name, entry in list(self._datasets.items()):
+            df, invariants, properties, masks = entry["dataset"]
+            info[name] = {
+                "objects": len(df),
+                "invariants": invariants,
+                "properties": properties,
+                "loaded": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(entry["loaded"])),
+            }
+        return info
+
+
+class ConjectureHandler(BaseHTTPRequestHandler):
+    """
+    Serves the requests of a ConjectureServer:
+
+    * GET /health returns {"status": "ok"} and the number of loaded datasets;
+    * GET /datasets returns the loaded datasets, see DatasetStore.info;
+    * POST /conjectures takes a job, a JSON object with the settings of a job of
+      python -m TxGraffiti.cli, and streams its conjectures, target by target, as JSON Lines,
+      or as csv with ?format=csv.
+
+    A job that fails once its response has started is logged with its traceback and, in JSON
+    Lines, ends with a record {"error": ...} so that the client can tell it from a finished job.
+    """
+    server_version = "TxGraffiti"
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Errors are logged even when the server is quiet.
+        super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        data = (json.dumps(body) + "\n").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "datasets": len(self.server.store.info())})
+        elif path == "/datasets":
+            self._send_json(200, self.server.store.info())
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/conjectures":
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+            return
+        output_format = parse_qs(url.query).get("format", ["jsonl"])[-1]
+        if output_format not in CONTENT_TYPES:
+            self._send_json(400, {"error": f"Unknown output format {output_format}, use jsonl or csv."})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(job, dict):
+                raise ValueError("A job must be a JSON object.")
+            check_job(job)
+            datasets = {job["dataset"]: self.server.store.get(job["dataset"])}
+            resolve_job(job, datasets)
+        except FileNotFoundError:
+            self._send_json(404, {"error": f"Unknown dataset {job['dataset']}"})
+            return
+        except (ValueError, TypeError) as error:
+            self._send_json(400, {"error": str(error)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[output_format])
+        self.end_headers()
+        stream = io.TextIOWrapper(self.wfile, encoding="utf-8", newline="", write_through=True)
+        cache = None if self.server.cache_path is None else BoundCache(self.server.cache_path)
+        start = time.time()
+        try:
+            written = run_job(job, 0, datasets, ConjectureWriter(stream, output_format), cache)
+            self.log_message("%s: %d conjectures in %.2fs", job["dataset"], written, time.time() - start)
+        except (BrokenPipeError, ConnectionResetError):
+            self.log_message("%s: the client closed the connection", job["dataset"])
+        except Exception as error:
+            self.log_error("%s: the job failed: %s", job["dataset"], error)
+            traceback.print_exc(file=sys.stderr)
+            if output_format == "jsonl":
+                try:
+                    stream.write(json.dumps({"error": f"{type(error).__name__}: {error}"}) + "\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+        finally:
+            stream.detach()
+            if cache is not None:
+                cache.close()
+
+
+class ConjectureServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server of conjectures on a DatasetStore, listening on a TCP address
+    (host, port) or, if address is a string, on a Unix socket at that path.
+
+    Every request is served by its own thread and opens its own connection to the bound cache
+    at cache_path, if given, which all requests share.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, store, cache_path=None, quiet=False):
+        self.store = store
+        self.cache_path = cache_path
+        self.quiet = quiet
+        if isinstance(address, str):
+            self.address_family = socket.AF_UNIX
+        super().__init__(address, ConjectureHandler)
+
+    def server_bind(self):
+        if self.address_family != socket.AF_UNIX:
+            super().server_bind()
+            return
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+        if self.address_family == socket.AF_UNIX and os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(store, host="127.0.0.1", port=8765, socket_path=None, cache_path=None, quiet=False):
+    """
+    Returns a ConjectureServer on the given store, listening on the Unix socket socket_path if
+    given and on host and port otherwise.
+
+    Examples
+    --------
+    >>> from TxGraffiti.server import DatasetStore, make_server
+    >>> server = make_server(DatasetStore(), port=8765)
+    >>> server.serve_forever()
+    """
+    address = socket_path if socket_path is not None else (host, port)
+    return ConjectureServer(address, store, cache_path, quiet)
+
+
+def _watch(store, interval, stop, quiet):
+    """
+    Reopens the changed datasets of store every interval seconds until stop is set, so that
+    the next request on a changed dataset finds it warm.
+    """
+    while not stop.wait(interval):
+        try:
+            changed = store.refresh()
+        except (OSError, ValueError, KeyError) as error:
+            print(f"cannot reload a dataset: {error}", file=sys.stderr)
+            continue
+        if changed and not quiet:
+            print(f"reloaded {', '.join(changed)}", file=sys.stderr)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m TxGraffiti.server",
+        description="Serve conjectures over HTTP from datasets kept in memory, reloading a dataset "
+                    "when its files change.",
+    )
+    parser.add_argument("datasets", nargs="*", help="the datasets to load at startup, e.g., graphs")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="the port to listen on (default: 8765)")
+    parser.add_argument("--socket", help="listen on a Unix socket at this path instead of a port")
+    parser.add_argument("--data-dir", default="math_data/data", help="the directory containing the datasets")
+    parser.add_argument("--cache", help="the bound cache file (default: bound_cache.sqlite in the data directory)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or store cached bounds")
+    parser.add_argument("--watch", type=float, default=2.0,
+                        help="the seconds between checks for changed datasets, 0 to only check on requests "
+                             "(default: 2)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not log requests on the standard error")
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the conjecture server until it is interrupted.
+
+    Examples
+    --------
+    $ python -m TxGraffiti.server graphs
+    $ curl -d '{"dataset": "graphs", "targets": ["domination_number"]}' localhost:8765/conjectures
+    """
+    args = _parser().parse_args(argv)
+    store = DatasetStore(args.data_dir)
+    for name in args.datasets:
+        start = time.time()
+        store.get(name)
+        if not args.quiet:
+            print(f"loaded {name} in {time.time() - start:.2f}s", file=sys.stderr)
+
+    cache_path = None
+    if not args.no_cache:
+        cache_path = args.cache or os.path.join(args.data_dir, "bound_cache.sqlite")
+        BoundCache(cache_path).close()
+    server = make_server(store, args.host, args.port, args.socket, cache_path, args.quiet)
+
+    stop = threading.Event()
+    if args.watch > 0:
+        threading.Thread(target=_watch, args=(store, args.watch, stop, args.quiet), daemon=True).start()
+    if not args.quiet:
+        where = args.socket if args.socket else f"http://{args.host}:{server.server_port}"
+        print(f"serving conjectures on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
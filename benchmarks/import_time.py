@@ -0,0 +1,69 @@
+"""
+Import-time regression benchmark.
+
+Imports each module of a scripted, non-interactive run in a fresh interpreter, reports the best
+time of several runs, and checks that none of the heavy optional dependencies were pulled in.
+Exits with status 1 if a module is slower than its budget or imports a heavy dependency.
+
+Run from the root of the repository:
+
+    python benchmarks/import_time.py
+"""
+import subprocess
+import sys
+
+# The modules of a scripted run, with their import-time budgets in seconds.
+MODULES = {
+    "TxGraffiti.functions.make_inequalities": 1.0,
+    "TxGraffiti.cli": 1.0,
+    "TxGraffiti.classes.conjecture_class": 0.5,
+    "math_data.functions.dataset": 1.0,
+    "math_data.functions.object_properties": 0.1,
+}
+
+# Dependencies that are only needed by some code paths and must be imported where they are used.
+HEAVY_MODULES = ["matplotlib", "pulp", "grinpy", "sympy", "pyfiglet", "halo"]
+
+RUNS = 5
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def import_time(module):
+    """
+    Returns the best import time of a module over RUNS fresh interpreters, and the heavy
+    dependencies it imported.
+    """
+    best = None
+    heavy = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", _SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True,
+        ).stdout.splitlines()
+        elapsed = float(output[0])
+        best = elapsed if best is None else min(best, elapsed)
+        heavy = [name for name in output[1].split(",") if name] if len(output) > 1 else []
+    return best, heavy
+
+
+def main():
+    failed = False
+    print(f"{'module':<45} {'time':>8} {'budget':>8}  heavy imports")
+    for module, budget in MODULES.items():
+        elapsed, heavy = import_time(module)
+        status = elapsed > budget or heavy
+        failed = failed or status
+        print(f"{module:<45} {elapsed:>7.3f}s {budget:>7.3f}s  {', '.join(heavy) or '-'}{'  FAIL' if status else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
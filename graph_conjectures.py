@@ -1,13 +1,12 @@
 from TxGraffiti.functions.make_inequalities import filter_known_conjectures, write_on_the_wall
-import pandas as pd
-from pyfiglet import figlet_format
-from halo import Halo
+from math_data.functions.dataset import load_dataset
 import time
 from datetime import datetime, timedelta
 
 __version__ = '1.0.0'
 
-# Print the title of the program.
+# Print the title of the program. pyfiglet is imported here, where it is used.
+from pyfiglet import figlet_format
 print(figlet_format('TxGRAFFITI', font='slant'))
 print('Version ' + __version__)
 print('Copyright ' + u'\u00a9' + ' 2023 Randy Davila')
@@ -16,14 +15,8 @@ print("TxGraffiti is a program that conjectures on data.")
 print()
 print()
 
-# Read the csv file into a dataframe.
-df = pd.read_csv(f"math_data/data/graphs.csv")
-
-# Gather all of the numerical columns in the dataframe.
-numerical_columns = [column for column in df.columns if df[column].dtype == "float64" or df[column].dtype == "int64"]
-
-# Gather all of the boolean columns in the dataframe.
-boolean_columns = [column for column in df.columns if df[column].dtype == "bool"]
+# Read the data, with its invariant (numerical) and property (boolean) columns.
+df, numerical_columns, boolean_columns = load_dataset("graphs")
 
 # Print the numerical columns as the invariants.
 print("The invariants are:")
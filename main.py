@@ -1,14 +1,15 @@
 from TxGraffiti.functions.make_inequalities import make_all_upper_linear_conjectures, make_all_lower_linear_conjectures
 from TxGraffiti.functions.make_inequalities import filter_conjectures, dalmatian, write_on_the_wall
-import pandas as pd
-from pyfiglet import figlet_format
-from halo import Halo
+from TxGraffiti.functions.prescreen import ScreenReport
+from TxGraffiti.functions.bound_cache import BoundCache
+from math_data.functions.dataset import load_dataset
 import time
 from datetime import datetime, timedelta
 
 __version__ = '1.0.0'
 
-# Print the title of the program.
+# Print the title of the program. pyfiglet is imported here, where it is used.
+from pyfiglet import figlet_format
 print(figlet_format('TxGRAFFITI', font='slant'))
 print('Version ' + __version__)
 print('Copyright ' + u'\u00a9' + ' 2023 Randy Davila')
@@ -23,14 +24,8 @@ print("Reading csv file...")
 print()
 # csv_name = "main"
 
-# Read the csv file into a dataframe.
-df = pd.read_csv(f"math_data/data/{csv_name}.csv")
-
-# Gather all of the numerical columns in the dataframe.
-numerical_columns = [column for column in df.columns if df[column].dtype == "float64" or df[column].dtype == "int64"]
-
-# Gather all of the boolean columns in the dataframe.
-boolean_columns = [column for column in df.columns if df[column].dtype == "bool"]
+# Read the data, with its invariant (numerical) and property (boolean) columns.
+df, numerical_columns, boolean_columns = load_dataset(csv_name)
 
 # Print the numerical columns as the invariants.
 print("The invariants are:")
@@ -41,6 +36,10 @@ for i, column in enumerate(numerical_columns):
 invariant_index = int(input("Enter the index of the invariant to conjecture on: "))
 print()
 
+# Count the bounds that are skipped before solving, and reuse the bounds of earlier runs.
+report = ScreenReport()
+cache = BoundCache()
+
 # Ask the user if they would like to only consider a single property.
 single_property_answer = input("Would you like to only consider a single property? (y/n): ")
 print()
@@ -63,11 +62,14 @@ if single_property_answer == "y":
 
     # write on the wall, i.e., conjecture on the data.
     if dalmatian_answer == "y":
-        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, [boolean_columns[property_index]])
+        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, [boolean_columns[property_index]], report=report, cache=cache)
     else:
-        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, [boolean_columns[property_index]], use_dalmation=False)
+        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, [boolean_columns[property_index]], use_dalmation=False, report=report, cache=cache)
 
     # print the conjectures.
+    print(report)
+    print(f"{cache.hits} bounds were read from the cache.")
+    print()
     print("The conjectures are:")
     for i, conjecture in enumerate(conjectures):
         print(f"Conjecture {i}: {conjecture} (touch = {conjecture.touch}) \n")
@@ -78,15 +80,16 @@ else:
 
     # write on the wall, i.e., conjecture on the data.
     if dalmatian_answer == "y":
-        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, boolean_columns)
+        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, boolean_columns, report=report, cache=cache)
     else:
-        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, boolean_columns, use_dalmation=False)
+        conjectures = write_on_the_wall(df, [numerical_columns[invariant_index]], numerical_columns, boolean_columns, use_dalmation=False, report=report, cache=cache)
 
     # print the conjectures.
+    print(report)
+    print(f"{cache.hits} bounds were read from the cache.")
+    print()
     print("The conjectures are:")
     for i, conjecture in enumerate(conjectures):
         print(f"Conjecture {i}: {conjecture} (touch = {conjecture.touch}) \n")
 
-
-
-
+cache.close()
@@ -1,2 +1,13 @@
-from math_data.functions.invariant_functions import *
-from math_data.functions.object_properties import *
\ No newline at end of file
+import importlib
+
+# The modules whose public names are available from math_data.functions. They are imported on
+# first use, since invariant_functions pulls in grinpy and sympy, which take about a second.
+_MODULES = ["math_data.functions.object_properties", "math_data.functions.invariant_functions"]
+
+
+def __getattr__(name):
+    for module_name in _MODULES:
+        module = importlib.import_module(module_name)
+        if name in module.__all__:
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
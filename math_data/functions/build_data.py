@@ -1,47 +1,101 @@
-from math_data.functions.invariant_functions import calc, property_check
-from math_data.functions.object_properties import invariant_names, property_names
+from math_data.functions.invariant_functions import (
+    EvaluationContext,
+    calc,
+    derive_columns,
+    get_node,
+    plain_value,
+    property_check,
+    split_computations,
+)
+from math_data.functions.invariant_cache import InvariantCache, graph_hash, isomorphism_classes
+from math_data.functions.dataset import write_dataset
+from math_data.functions import object_properties
 
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
 import os
+import traceback
 import grinpy as gp
 import pandas as pd
 
 
+def _default_names(invariants, properties):
+    """
+    Returns the given invariants and properties, with the names listed in invariants.txt and
+    properties.txt in place of None.
+    """
+    if invariants is None:
+        invariants = object_properties.invariant_names
+    if properties is None:
+        properties = object_properties.property_names
+    return invariants, properties
+
+
+def _object_values(G, columns, invariants, cache=None):
+    """
+    Yields (column, value) for the given invariant and property columns of G, with every value
+    converted by plain_value. Values found in the cache are used as they are, and computed values
+    are added to the cache.
+    """
+    context = EvaluationContext(G)
+    cached = {}
+    if cache is not None:
+        graph_id = cache.graph_id(G, create=True)
+        cached = cache.get_values(graph_id)
+    for column in columns:
+        if column in cached:
+            yield column, cached[column]
+            continue
+        if column in invariants:
+            value = plain_value(calc(G, column, context))
+        else:
+            value = plain_value(property_check(G, column, context))
+        if cache is not None:
+            cache.set_value(graph_id, column, value)
+        yield column, value
+
 def get_object_data(
         G,
         name="G",
-        invariants=invariant_names,
-        properties=property_names,
+        invariants=None,
+        properties=None,
+        cache=None,
     ):
     """
-    Returns a dictionary of graph invariants and properties of a given graph G.
+    Returns a dictionary of graph invariants and properties of a given graph G. All of the
+    invariants and properties share one EvaluationContext, so every underlying grinpy value is
+    computed once for G.
 
     Parameters
     ----------
     G : NetworkX graph
         An undirected graph.
     invariants : list of strings
-        A list of graph invariants to be calculated for the graph G.
+        A list of graph invariants to be calculated for the graph G. If None, the
+        names listed in invariants.txt are used.
     properties : list of strings
-        A list of graph properties to be checked for the graph G.
+        A list of graph properties to be checked for the graph G. If None, the
+        names listed in properties.txt are used.
+    cache : InvariantCache
+        A cache consulted before computing any value, and updated with newly computed values.
 
     Returns
     -------
     dict
         A dictionary of graph invariants and properties of the graph G.
     """
+    invariants, properties = _default_names(invariants, properties)
     data = {}
     data["name"] = name
-    for invariant in invariants:
-        data[invariant] = calc(G, invariant)
-    for property in properties:
-        data[property] = property_check(G, property)
+    data.update(_object_values(G, list(invariants) + list(properties), set(invariants), cache))
     return data
 
 def get_object_data_from_file(
         name,
         path="math_data/data/graph_data",
-        invariants=invariant_names,
-        properties=property_names,
+        invariants=None,
+        properties=None,
     ):
     """
     Returns a dictionary of graph invariants and properties of a given graph G.
@@ -51,23 +105,26 @@ def get_object_data_from_file(
     filename : string
         The name of the file containing the graph G.
     invariants : list of strings
-        A list of graph invariants to be calculated for the graph G.
+        A list of graph invariants to be calculated for the graph G. If None, the
+        names listed in invariants.txt are used.
     properties : list of strings
-        A list of graph properties to be checked for the graph G.
+        A list of graph properties to be checked for the graph G. If None, the
+        names listed in properties.txt are used.
 
     Returns
     -------
     dict
         A dictionary of graph invariants and properties of the graph G.
     """
+    invariants, properties = _default_names(invariants, properties)
     G = gp.read_edgelist(path + "/" + name + ".txt")
     return get_object_data(G, name, invariants, properties)
 
 def make_object_dataframe(
         graphs,
         names,
-        invariants=invariant_names,
-        properties=property_names,
+        invariants=None,
+        properties=None,
     ):
     """
     Returns a pandas dataframe of graph invariants and properties of a list of graphs.
@@ -77,15 +134,18 @@ def make_object_dataframe(
     graphs : list of NetworkX graphs
         A list of undirected graphs.
     invariants : list of strings
-        A list of graph invariants to be calculated for the graphs.
+        A list of graph invariants to be calculated for the graphs. If None, the
+        names listed in invariants.txt are used.
     properties : list of strings
-        A list of graph properties to be checked for the graphs.
+        A list of graph properties to be checked for the graphs. If None, the
+        names listed in properties.txt are used.
 
     Returns
     -------
     pandas dataframe
         A pandas dataframe of graph invariants and properties of the graphs.
     """
+    invariants, properties = _default_names(invariants, properties)
     data = []
     for G, name in zip(graphs, names):
         data.append(get_object_data(G, name, invariants, properties))
@@ -103,41 +163,330 @@ def get_object_names(path):
     Returns
     -------
     list of strings
-        A list of graph names.
+        A list of graph names, sorted so that builds have a deterministic row order.
+    """
+    return sorted(os.listdir(path))
+
+def _read_checkpoint(checkpoint_file, digest):
+    """
+    Returns the values stored in a graph checkpoint file.
+
+    A checkpoint file holds one JSON object per line: a header {"digest": ...} with the SHA-256
+    of the edgelist it was computed from, followed by one {"column": ..., "value": ...} line per
+    finished cell. A missing file, a file written for a different edgelist, or a partially
+    written last line (from an interrupted build) is rewritten so that new cells can be appended.
     """
-    return os.listdir(path)
+    values = {}
+    valid = False
+    if os.path.exists(checkpoint_file):
+        with open(checkpoint_file) as f:
+            lines = f.read().split("\n")
+        try:
+            valid = json.loads(lines[0]).get("digest") == digest
+        except ValueError:
+            valid = False
+        if valid:
+            for line in lines[1:]:
+                if not line:
+                    continue
+                try:
+                    cell = json.loads(line)
+                except ValueError:
+                    valid = False
+                    break
+                values[cell["column"]] = cell["value"]
+            if lines[-1] != "":
+                valid = False
+
+    if not valid:
+        _write_checkpoint(checkpoint_file, digest, values)
+    return values
+
+def _write_checkpoint(checkpoint_file, digest, values):
+    """
+    Writes a graph checkpoint file holding the given values, see _read_checkpoint.
+    """
+    with open(checkpoint_file, "w") as f:
+        f.write(json.dumps({"digest": digest}) + "\n")
+        for column, value in values.items():
+            f.write(json.dumps({"column": column, "value": value}) + "\n")
+
+def _file_digest(graph_file):
+    """
+    Returns the SHA-256 of an edgelist file, as stored in its checkpoint file.
+    """
+    with open(graph_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _checkpoint_complete(graph_file, checkpoint_file, columns):
+    """
+    Returns True if the checkpoint file of a graph holds every given column for the current
+    edgelist, so that the graph needs no computation at all.
+    """
+    if not os.path.exists(checkpoint_file):
+        return False
+    values = _read_checkpoint(checkpoint_file, _file_digest(graph_file))
+    return all(column in values for column in columns)
+
+def get_object_data_checkpointed(
+        graph_file,
+        checkpoint_file,
+        name="G",
+        invariants=None,
+        properties=None,
+        cache=None,
+    ):
+    """
+    Returns a dictionary of graph invariants and properties of the graph in a given edgelist
+    file, appending every finished value to a checkpoint file as soon as it is computed.
+
+    Values already in the checkpoint file are reused as long as the edgelist has not changed
+    since they were written, so only missing cells are computed. If every cell is present the
+    graph is not even read.
+
+    Parameters
+    ----------
+    graph_file : string
+        The path to the edgelist file of the graph.
+    checkpoint_file : string
+        The path to the checkpoint file of the graph.
+    name : string
+        The name of the graph.
+    invariants : list of strings
+        A list of graph invariants to be calculated for the graph. If None, the
+        names listed in invariants.txt are used.
+    properties : list of strings
+        A list of graph properties to be checked for the graph. If None, the
+        names listed in properties.txt are used.
+    cache : InvariantCache
+        A cache consulted before computing any missing value, and updated with new values.
+
+    Returns
+    -------
+    dict
+        A dictionary of graph invariants and properties of the graph.
+    """
+    invariants, properties = _default_names(invariants, properties)
+    values = _read_checkpoint(checkpoint_file, _file_digest(graph_file))
+
+    missing_invariants = [invariant for invariant in invariants if invariant not in values]
+    missing_properties = [property for property in properties if property not in values]
+    if missing_invariants or missing_properties:
+        G = gp.read_edgelist(graph_file)
+        missing = missing_invariants + missing_properties
+        with open(checkpoint_file, "a") as f:
+            for column, value in _object_values(G, missing, set(missing_invariants), cache):
+                values[column] = value
+                f.write(json.dumps({"column": column, "value": values[column]}) + "\n")
+                f.flush()
+
+    data = {}
+    data["name"] = name
+    for column in list(invariants) + list(properties):
+        data[column] = values[column]
+    return data
+
+_open_caches = {}
+
+def _open_cache(cache_path):
+    """
+    Returns the InvariantCache stored at cache_path, opening it once per process.
+    """
+    if cache_path is None:
+        return None
+    if cache_path not in _open_caches:
+        _open_caches[cache_path] = InvariantCache(cache_path)
+    return _open_caches[cache_path]
+
+def _read_graph(graph_file):
+    """
+    Returns the graph in an edgelist file, or None if the file cannot be read.
+    """
+    try:
+        return gp.read_edgelist(graph_file)
+    except Exception:
+        return None
+
+def _graph_hash_task(graph_file):
+    """
+    Returns the graph_hash of the graph in an edgelist file, or None if the file cannot be read.
+    This runs inside the worker processes of make_object_data_csv.
+    """
+    G = _read_graph(graph_file)
+    return None if G is None else graph_hash(G)
+
+def _isomorphism_representatives(graph_files, executor=None):
+    """
+    Returns, for every edgelist file, the index of the first file holding a graph isomorphic to
+    it. The graph hashes are computed in the executor, if given, and only graphs with equal
+    hashes are read again and compared by isomorphism tests.
+    """
+    if executor is None:
+        hashes = [_graph_hash_task(graph_file) for graph_file in graph_files]
+    else:
+        hashes = list(executor.map(_graph_hash_task, graph_files))
+    buckets = {}
+    for i, key in enumerate(hashes):
+        if key is not None:
+            buckets.setdefault(key, []).append(i)
+    representatives = list(range(len(graph_files)))
+    for key, members in buckets.items():
+        if len(members) > 1:
+            graphs = [_read_graph(graph_files[i]) for i in members]
+            for i, j in zip(members, isomorphism_classes(graphs, [key] * len(members))):
+                representatives[i] = members[j]
+    return representatives
+
+def _object_data_task(task):
+    """
+    Reads one graph file and returns (data, error), where exactly one of the two is None. This
+    runs inside the worker processes of make_object_data_csv, so errors are returned as
+    formatted tracebacks instead of being raised.
+    """
+    path, graph_name, invariants, properties, checkpoint_dir, cache_path = task
+    try:
+        graph_file = path + "/" + graph_name
+        cache = _open_cache(cache_path)
+        if checkpoint_dir is not None:
+            checkpoint_file = os.path.join(checkpoint_dir, graph_name + ".jsonl")
+            return get_object_data_checkpointed(graph_file, checkpoint_file, graph_name, invariants, properties, cache), None
+        G = gp.read_edgelist(graph_file)
+        return get_object_data(G, graph_name, invariants, properties, cache), None
+    except Exception:
+        return None, traceback.format_exc()
 
 def make_object_data_csv(
         name="main",
         path="math_data/data/graph_data",
-        invariants=invariant_names,
-        properties=property_names
+        invariants=None,
+        properties=None,
+        workers=1,
+        checkpoint=True,
+        cache=None,
+        deduplicate=False,
     ):
     """
-    Returns a pandas dataframe of graph invariants and properties of a list of graphs.
+    Returns a pandas dataframe of graph invariants and properties of a list of graphs, and
+    writes it to math_data/data/<name>.csv and to the typed columnar dataset
+    math_data/data/<name>.columns, see load_dataset.
+
+    With more than one worker the graphs are spread over a process pool. The rows always come
+    back in the order of get_object_names. A graph whose data cannot be computed is reported
+    and left out of the dataframe instead of stopping the build; the failures are kept in
+    df.attrs["failures"] as a dictionary from graph name to traceback.
+
+    With checkpointing on, every finished (graph, column) value is written to
+    math_data/data/checkpoints/<name>/ as soon as it is computed, so an interrupted build picks
+    up where it stopped. A rerun only computes new graphs, new invariant and property columns,
+    and graphs whose edgelist file changed.
+
+    With deduplication on, graphs in the directory that are isomorphic to an earlier graph are
+    computed only once and their row is copied, including into their own checkpoint files. The
+    graph hashes this needs are computed in the process pool, and the step is skipped when
+    every graph is already checkpointed. Given a cache file, values are also shared with every earlier build
+    that used the same cache, across file names and datasets.
+
+    Only the columns that need the graph are computed graph by graph. Columns that are functions
+    of other columns, such as "(order - domination_number)" or "a connected and cubic graph",
+    are derived afterwards in one vectorized pass over the whole dataframe, see
+    split_computations.
 
     Parameters
     ----------
     path : string
         The path to the directory containing the graphs.
     invariants : list of strings
-        A list of graph invariants to be calculated for the graphs.
+        A list of graph invariants to be calculated for the graphs. If None, the
+        names listed in invariants.txt are used.
     properties : list of strings
-        A list of graph properties to be checked for the graphs.
+        A list of graph properties to be checked for the graphs. If None, the
+        names listed in properties.txt are used.
+    workers : int
+        The number of worker processes. If None, the number of CPUs is used.
+    checkpoint : bool
+        Whether to checkpoint finished values to disk and resume from earlier checkpoints.
+    cache : string
+        The path of an InvariantCache database to consult and update, or None.
+    deduplicate : bool
+        Whether to compute isomorphic graphs in the directory only once, which pays off for
+        directories with many isomorphic copies.
 
     Returns
     -------
     pandas dataframe
         A pandas dataframe of graph invariants and properties of the graphs.
+
+    Examples
+    --------
+    >>> from math_data.functions.build_data import make_object_data_csv
+    >>> df = make_object_data_csv(name="graphs", workers=8)
     """
+    invariants, properties = _default_names(invariants, properties)
     graph_names = get_object_names(path)
-    graphs = []
-    for graph_name in graph_names:
-        graphs.append(gp.read_edgelist(path + "/" + graph_name))
-    df = make_object_dataframe(graphs, graph_names, invariants, properties)
-    df.set_index("name", inplace=True)
-    df.to_csv(f"math_data/data/{name}.csv")
+    checkpoint_dir = None
+    if checkpoint:
+        checkpoint_dir = f"math_data/data/checkpoints/{name}"
+        os.makedirs(checkpoint_dir, exist_ok=True)
 
+    graph_columns, derived_columns = split_computations(invariants, properties)
+    graph_invariants = [column for column in graph_columns if get_node(column).kind != "property"]
+    graph_properties = [column for column in graph_columns if get_node(column).kind == "property"]
+    graph_files = [path + "/" + graph_name for graph_name in graph_names]
+    checkpoint_files = None
+    if checkpoint_dir is not None:
+        checkpoint_files = [os.path.join(checkpoint_dir, graph_name + ".jsonl") for graph_name in graph_names]
 
+    executor = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Map every graph to the first graph in the directory isomorphic to it.
+        representatives = list(range(len(graph_names)))
+        if deduplicate and not (checkpoint_files is not None and all(
+            _checkpoint_complete(graph_file, checkpoint_file, graph_columns)
+            for graph_file, checkpoint_file in zip(graph_files, checkpoint_files)
+        )):
+            representatives = _isomorphism_representatives(graph_files, executor)
+        unique = sorted(set(representatives))
+        if len(unique) < len(graph_names):
+            print(f"{len(graph_names) - len(unique)} graphs are isomorphic to another graph and are computed once.")
 
+        tasks = [(path, graph_names[i], graph_invariants, graph_properties, checkpoint_dir, cache) for i in unique]
+        if executor is None:
+            results = [_object_data_task(task) for task in tasks]
+        else:
+            results = list(executor.map(_object_data_task, tasks))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    results = dict(zip(unique, results))
 
+    # Checkpoint the copied rows too, so that a rerun finds every graph done.
+    if checkpoint_files is not None:
+        for i, representative in enumerate(representatives):
+            row, error = results[representative]
+            if i != representative and error is None:
+                values = {column: row[column] for column in graph_columns}
+                _write_checkpoint(checkpoint_files[i], _file_digest(graph_files[i]), values)
+
+    data = []
+    failures = {}
+    for graph_name, representative in zip(graph_names, representatives):
+        row, error = results[representative]
+        if error is None:
+            data.append(dict(row, name=graph_name))
+        else:
+            failures[graph_name] = error
+            print(f"Failed to compute the data of {graph_name}:\n{error}")
+
+    df = pd.DataFrame(data, columns=["name"] + graph_columns).set_index("name")
+    derive_failures = {}
+    df = derive_columns(df, derived_columns, derive_failures)
+    for graph_name, error in derive_failures.items():
+        failures[graph_name] = error
+        print(f"Failed to compute the data of {graph_name}:\n{error}")
+    if failures:
+        print(f"{len(failures)} of {len(graph_names)} graphs failed and were left out.")
+    df = df[list(invariants) + list(properties)]
+    df.to_csv(f"math_data/data/{name}.csv")
+    write_dataset(df, f"math_data/data/{name}.columns", invariants, properties)
+    df.attrs["failures"] = failures
+    return df
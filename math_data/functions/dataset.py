@@ -0,0 +1,189 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+__all__ = ["compact_dtype", "write_dataset", "read_dataset", "load_dataset"]
+
+# The version of the columnar dataset layout written by write_dataset.
+FORMAT_VERSION = 1
+
+_INTEGER_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def compact_dtype(values):
+    """
+    Returns the smallest dtype that stores a numeric column without loss.
+
+    Integer columns get the smallest signed integer type holding their range; signed types are
+    used so that differences of columns cannot wrap around. Any other column keeps its dtype.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The values of the column.
+
+    Returns
+    -------
+    numpy.dtype
+        The compact dtype.
+
+    Examples
+    --------
+    >>> from math_data.functions.dataset import compact_dtype
+    >>> import numpy as np
+    >>> compact_dtype(np.array([0, 12, 300]))
+    dtype('int16')
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "iu":
+        return values.dtype
+    if len(values) == 0:
+        return np.dtype(np.int8)
+    low, high = int(values.min()), int(values.max())
+    for dtype in _INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return values.dtype
+
+
+def write_dataset(df, path, invariants, properties):
+    """
+    Writes a dataframe of invariants and properties to a columnar binary dataset.
+
+    The dataset is a directory holding one .npy file per column and a schema.json listing, for
+    every column, its name, its kind ("name", "invariant", or "property"), its dtype, and its
+    file. Integer invariants are stored with the smallest integer dtype holding them and
+    properties are stored as packed bits, so the dataset is a fraction of the size of the csv
+    file and read_dataset can memory-map it instead of parsing text.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe, with the object names either as a "name" column or as the index.
+    path : string
+        The directory to write the dataset to. It is created if needed and its previous
+        dataset, if any, is replaced.
+    invariants : list of strings
+        The invariant columns.
+    properties : list of strings
+        The property columns.
+
+    Examples
+    --------
+    >>> from math_data.functions.dataset import write_dataset
+    >>> write_dataset(df, "math_data/data/graphs.columns", invariant_names, property_names)
+    """
+    if "name" not in df.columns:
+        df = df.reset_index()
+    os.makedirs(path, exist_ok=True)
+
+    columns = []
+    for kind, names in [("name", ["name"]), ("invariant", invariants), ("property", properties)]:
+        for column in names:
+            values = df[column].to_numpy()
+            file_name = f"{len(columns):05d}.npy"
+            if kind == "name":
+                values = values.astype(str)
+                dtype = values.dtype.str
+            elif kind == "property":
+                dtype = "bool"
+                values = np.packbits(values.astype(bool))
+            else:
+                values = values.astype(compact_dtype(values))
+                dtype = values.dtype.str
+            np.save(os.path.join(path, file_name), values)
+            columns.append({"name": column, "kind": kind, "dtype": dtype, "file": file_name})
+
+    schema = {"format": FORMAT_VERSION, "rows": len(df), "columns": columns}
+    with open(os.path.join(path, "schema.json"), "w") as schema_file:
+        json.dump(schema, schema_file, indent=1)
+
+    # Remove column files left over from a previous dataset with more columns.
+    files = {column["file"] for column in columns}
+    for file_name in os.listdir(path):
+        if file_name.endswith(".npy") and file_name not in files:
+            os.remove(os.path.join(path, file_name))
+
+
+def read_dataset(path, mmap=True):
+    """
+    Returns the dataframe stored in a columnar binary dataset written by write_dataset.
+
+    Parameters
+    ----------
+    path : string
+        The directory of the dataset.
+    mmap : bool
+        Whether to memory-map the name and invariant columns instead of reading them into
+        memory. Property columns are always unpacked into bool arrays.
+
+    Returns
+    -------
+    tuple
+        A triple (df, invariants, properties) of the dataframe, with the names in a "name"
+        column, and the lists of invariant and property columns.
+
+    Examples
+    --------
+    >>> from math_data.functions.dataset import read_dataset
+    >>> df, invariants, properties = read_dataset("math_data/data/graphs.columns")
+    """
+    with open(os.path.join(path, "schema.json")) as schema_file:
+        schema = json.load(schema_file)
+    if schema["format"] != FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported dataset format {schema['format']}.")
+
+    rows = schema["rows"]
+    data = {}
+    invariants = []
+    properties = []
+    for column in schema["columns"]:
+        values = np.load(os.path.join(path, column["file"]), mmap_mode="r" if mmap else None)
+        if column["kind"] == "property":
+            values = np.unpackbits(values, count=rows).astype(bool)
+            properties.append(column["name"])
+        elif column["kind"] == "invariant":
+            invariants.append(column["name"])
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False), invariants, properties
+
+
+def load_dataset(name, directory="math_data/data"):
+    """
+    Returns the dataset of the given name with its invariant and property columns.
+
+    The columnar dataset <directory>/<name>.columns is used when it is at least as new as the
+    csv file <directory>/<name>.csv. Otherwise the csv file is read and, since it has no schema,
+    the numeric columns are taken as the invariants and the boolean columns as the properties.
+
+    Parameters
+    ----------
+    name : string
+        The name of the dataset, e.g., "graphs".
+    directory : string
+        The directory containing the datasets.
+
+    Returns
+    -------
+    tuple
+        A triple (df, invariants, properties), see read_dataset.
+
+    Examples
+    --------
+    >>> from math_data.functions.dataset import load_dataset
+    >>> df, invariants, properties = load_dataset("graphs")
+    """
+    csv_file = os.path.join(directory, f"{name}.csv")
+    columns_path = os.path.join(directory, f"{name}.columns")
+    schema_file = os.path.join(columns_path, "schema.json")
+    if os.path.exists(schema_file) and (
+        not os.path.exists(csv_file) or os.path.getmtime(schema_file) >= os.path.getmtime(csv_file)
+    ):
+        return read_dataset(columns_path)
+
+    df = pd.read_csv(csv_file)
+    invariants = [column for column in df.columns if df[column].dtype == "float64" or df[column].dtype == "int64"]
+    properties = [column for column in df.columns if df[column].dtype == "bool"]
+    return df, invariants, properties
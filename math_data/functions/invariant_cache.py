@@ -0,0 +1,200 @@
+import json
+import sqlite3
+import networkx as nx
+
+__all__ = ["graph_hash", "isomorphism_classes", "InvariantCache"]
+
+
+# The version of graph_hash, part of every hash so that hashes of other versions never match.
+HASH_VERSION = 2
+
+
+def _node_labels(G):
+    """
+    Returns, for every vertex, a label made of its degree, the number of triangles through it,
+    and the number of vertices at every distance from it. These are invariant under
+    isomorphism and, unlike the degree alone, tell apart most vertices of regular graphs.
+    """
+    triangles = nx.triangles(G)
+    labels = {}
+    for v in G:
+        distances = nx.single_source_shortest_path_length(G, v)
+        profile = [0] * (max(distances.values()) + 1)
+        for distance in distances.values():
+            profile[distance] += 1
+        labels[v] = f"{G.degree(v)}|{triangles[v]}|{','.join(map(str, profile))}"
+    return labels
+
+
+def graph_hash(G):
+    """
+    Returns an isomorphism-invariant hash of a graph.
+
+    The hash is the Weisfeiler-Lehman hash of G with every vertex labeled by its degree, its
+    number of triangles, and its distance profile, see _node_labels. Plain Weisfeiler-Lehman
+    hashing gives the same hash to all regular graphs of the same order and degree; the labels
+    separate nearly all of them, so the buckets of equal hashes stay small. Isomorphic graphs
+    always get the same hash, but non-isomorphic graphs may still collide, so equal hashes only
+    mark candidates that have to be checked with an isomorphism test.
+
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+
+    Returns
+    -------
+    string
+        The hash of G.
+    """
+    G = nx.Graph(G)
+    nx.set_node_attributes(G, _node_labels(G), "label")
+    wl_hash = nx.weisfeiler_lehman_graph_hash(G, node_attr="label", iterations=3)
+    return f"{HASH_VERSION}:{G.number_of_nodes()}:{G.number_of_edges()}:{wl_hash}"
+
+
+def isomorphism_classes(graphs, hashes=None):
+    """
+    Returns, for every graph in a list, the index of the first graph in the list it is
+    isomorphic to.
+
+    Parameters
+    ----------
+    graphs : list of NetworkX graphs
+        A list of undirected graphs.
+    hashes : list of strings
+        The graph_hash of every graph, e.g., computed in worker processes. If None, they are
+        computed here.
+
+    Returns
+    -------
+    list of int
+        The index of the representative of each graph; a graph is its own representative if
+        no earlier graph is isomorphic to it.
+    """
+    if hashes is None:
+        hashes = [graph_hash(G) for G in graphs]
+    buckets = {}
+    representatives = []
+    for i, G in enumerate(graphs):
+        bucket = buckets.setdefault(hashes[i], [])
+        for j in bucket:
+            if nx.is_isomorphic(G, graphs[j]):
+                representatives.append(j)
+                break
+        else:
+            bucket.append(i)
+            representatives.append(i)
+    return representatives
+
+
+def _encode_graph(G):
+    """
+    Returns a JSON description of G with its vertices relabeled 0, ..., n - 1.
+    """
+    H = nx.convert_node_labels_to_integers(G)
+    return json.dumps({"order": H.number_of_nodes(), "edges": sorted(map(sorted, H.edges()))})
+
+
+def _decode_graph(text):
+    """
+    Returns the graph described by _encode_graph.
+    """
+    data = json.loads(text)
+    G = nx.empty_graph(data["order"])
+    G.add_edges_from(data["edges"])
+    return G
+
+
+class InvariantCache:
+    """
+    A persistent cache of invariant and property values keyed by graph isomorphism class.
+
+    The cache is an SQLite database. Each stored graph is filed under its graph_hash, and a
+    lookup compares the graph with the stored graphs of the same hash by an isomorphism test, so
+    a value computed once is reused for every graph isomorphic to it, under any file name and in
+    any dataset.
+
+    Attributes
+    ----------
+    path : string
+        The path of the SQLite database file.
+
+    Methods
+    -------
+    graph_id(G, create=False):
+        Returns the id of the isomorphism class of G in the cache.
+    get_values(graph_id):
+        Returns a dictionary of all of the values cached for a graph id.
+    set_value(graph_id, column, value):
+        Stores the value of an invariant or property for a graph id.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_cache import InvariantCache
+    >>> import grinpy as gp
+    >>> cache = InvariantCache("math_data/data/invariant_cache.sqlite")
+    >>> graph_id = cache.graph_id(gp.petersen_graph(), create=True)
+    >>> cache.set_value(graph_id, "domination_number", 3)
+    >>> cache.get_values(graph_id)
+    {'domination_number': 3}
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS graphs (id INTEGER PRIMARY KEY, hash TEXT, graph TEXT)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS graphs_hash ON graphs (hash)")
+        if self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'graphs_key'").fetchone() is None:
+            # Caches written before the unique key may hold the same graph twice; keep its first row.
+            self.connection.execute(
+                "DELETE FROM graphs WHERE id NOT IN (SELECT MIN(id) FROM graphs GROUP BY hash, graph)"
+            )
+            self.connection.execute("CREATE UNIQUE INDEX graphs_key ON graphs (hash, graph)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS graph_values "
+            "(graph_id INTEGER, column TEXT, value TEXT, PRIMARY KEY (graph_id, column))"
+        )
+        self.connection.commit()
+
+    def _find(self, G, key):
+        rows = self.connection.execute("SELECT id, graph FROM graphs WHERE hash = ?", (key,))
+        for graph_id, text in rows.fetchall():
+            if nx.is_isomorphic(G, _decode_graph(text)):
+                return graph_id
+        return None
+
+    def graph_id(self, G, create=False):
+        key = graph_hash(G)
+        graph_id = self._find(G, key)
+        if graph_id is not None or not create:
+            return graph_id
+        # Look again holding the write lock, so that two processes adding the same graph cannot
+        # both miss it and insert it twice.
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            graph_id = self._find(G, key)
+            if graph_id is None:
+                graph_id = self.connection.execute(
+                    "INSERT INTO graphs (hash, graph) VALUES (?, ?)", (key, _encode_graph(G))
+                ).lastrowid
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        return graph_id
+
+    def get_values(self, graph_id):
+        rows = self.connection.execute(
+            "SELECT column, value FROM graph_values WHERE graph_id = ?", (graph_id,)
+        )
+        return {column: json.loads(value) for column, value in rows.fetchall()}
+
+    def set_value(self, graph_id, column, value):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO graph_values (graph_id, column, value) VALUES (?, ?, ?)",
+                (graph_id, column, json.dumps(value)),
+            )
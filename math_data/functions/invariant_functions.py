@@ -1,544 +1,762 @@
+import numbers
+import operator
+import re
 import grinpy as gp
+import numpy as np
+import pandas as pd
 from sympy import divisors, totient, mobius, primefactors, isprime
 
-__all__ = ["calc", "property_check"]
+__all__ = [
+    "EvaluationContext",
+    "Node",
+    "register",
+    "register_property",
+    "register_expression",
+    "parse_expression",
+    "get_node",
+    "evaluation_order",
+    "base_computations",
+    "split_computations",
+    "derive_columns",
+    "plain_value",
+    "calc",
+    "property_check",
+]
+
+
+class Node:
+    """
+    A registered invariant, property, or intermediate value.
+
+    Attributes
+    ----------
+    name : string
+        The name of the node, i.e., the column name for invariants and properties.
+    function : callable
+        The function computing the value from the values of the dependencies, in order. The
+        special dependency "graph" stands for the graph itself. Properties have no function.
+    dependencies : tuple of strings
+        The names of the nodes the value is computed from. For properties these are the
+        conditions whose conjunction is the property, checked in order.
+    kind : string
+        One of "invariant", "property", or "intermediate".
+    vectorized : bool
+        Whether the function also accepts numpy arrays of dependency values and returns the array
+        of results.
+    scalar : bool
+        Whether the value is a number or a bool that can be stored as a dataframe cell, as opposed
+        to an intermediate object such as the line graph.
+    cheap : bool
+        Whether the value is cheap enough to compute for every graph even when it is only needed
+        to derive a property.
+    """
+    def __init__(self, name, function, dependencies=("graph",), kind="invariant", vectorized=False, scalar=True, cheap=False):
+        self.name = name
+        self.function = function
+        self.dependencies = tuple(dependencies)
+        self.kind = kind
+        self.vectorized = vectorized
+        self.scalar = scalar
+        self.cheap = cheap
+
+    def __repr__(self):
+        return f"Node({self.name!r}, {self.kind}, dependencies={self.dependencies})"
+
+
+# The registry of all named invariants, properties, and intermediate values. A name that is not
+# registered is treated as the grinpy function of that name applied to the graph.
+REGISTRY = {}
 
 
-def calc(G, invariant):
+def register(name, function, dependencies=("graph",), kind="invariant", vectorized=False, scalar=True, cheap=False):
     """
-    Returns the value of a given graph invariant for a given graph G.
+    Registers an invariant or intermediate value and returns its Node.
 
     Parameters
     ----------
-    G : NetworkX graph
-        An undirected graph.
-    invariant : string
-        The name of the graph invariant to be calculated for the graph G.
+    name : string
+        The name of the value.
+    function : callable
+        The function computing the value from the values of its dependencies.
+    dependencies : tuple of strings
+        The names of the values the function takes, in order; "graph" is the graph itself.
+    kind : string
+        Either "invariant" or "intermediate".
+    vectorized : bool
+        Whether the function also works elementwise on numpy arrays.
+    scalar : bool
+        Whether the value can be stored as a dataframe cell.
+    cheap : bool
+        Whether the value is cheap to compute for every graph.
 
     Returns
     -------
-    int
-        The value of the graph invariant for the graph G.
+    Node
+        The registered node.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import register
+    >>> import grinpy as gp
+    >>> register("order", gp.number_of_nodes, cheap=True)
     """
-    if invariant == "k_slater_index":
-        return k_slater_index(G)
-    elif invariant == "vertex_cover_number":
-        return vertex_cover_number(G)
-    elif invariant == "k_residual_index":
-        return k_residual_index(G)
-    elif invariant == "order":
-        return gp.number_of_nodes(G)
-    elif invariant == "size":
-        return gp.number_of_edges(G)
-    elif invariant == "(order - domination_number)":
-        return gp.number_of_nodes(G) - gp.domination_number(G)
-    elif invariant == "(order - total_domination_number)":
-        return gp.number_of_nodes(G) - gp.total_domination_number(G)
-    elif invariant == "(order - connected_domination_number)":
-        return gp.number_of_nodes(G) - gp.connected_domination_number(G)
-    elif invariant == "(order - independence_number)":
-        return gp.number_of_nodes(G) - gp.independence_number(G)
-    elif invariant == "(order - power_domination_number)":
-        return gp.number_of_nodes(G) - gp.power_domination_number(G)
-    elif invariant == "(order - zero_forcing_number)":
-        return gp.number_of_nodes(G) - gp.zero_forcing_number(G)
-    elif invariant == "(order - diameter)":
-        return gp.number_of_nodes(G) - gp.diameter(G)
-    elif invariant == "(order - radius)":
-        return gp.number_of_nodes(G) - gp.radius(G)
-    elif invariant == "(order - triameter)":
-        return gp.number_of_nodes(G) - gp.triameter(G)
-    elif invariant == "(size - diameter)":
-        return gp.number_of_edges(G) - gp.diameter(G)
-    elif invariant == "(size - radius)":
-        return gp.number_of_edges(G) - gp.radius(G)
-    elif invariant == "(size - triameter)":
-        return gp.number_of_edges(G) - gp.triameter(G)
-    elif invariant == "(order - independent_domination_number)":
-        return gp.number_of_nodes(G) - gp.independent_domination_number(G)
-    elif invariant == "(order - chromatic_number)":
-        return gp.number_of_nodes(G) - gp.chromatic_number(G)
-    elif invariant == "(order - matching_number)":
-        return gp.number_of_nodes(G) - gp.matching_number(G)
-    elif invariant == "(order - min_maximal_matching_number)":
-        return gp.number_of_nodes(G) - gp.min_maximal_matching_number(G)
-    elif invariant == "(size - matching_number)":
-        return gp.number_of_edges(G) - gp.matching_number(G)
-    elif invariant == "(size - min_maximal_matching_number)":
-        return gp.number_of_edges(G) - gp.min_maximal_matching_number(G)
-    elif invariant == "(order - min_degree)":
-        return gp.number_of_nodes(G) - gp.min_degree(G)
-    elif invariant == "(order - max_degree)":
-        return gp.number_of_nodes(G) - gp.max_degree(G)
-    elif invariant == "(order - clique_number)":
-        return gp.number_of_nodes(G) - gp.clique_number(G)
-    elif invariant == "(order - residue)":
-        return gp.number_of_nodes(G) - gp.residue(G)
-    elif invariant == "(order - annihilation_number)":
-        return gp.number_of_nodes(G) - gp.annihilation_number(G)
-    elif invariant == "(order - sub_total_domination_number)":
-        return gp.number_of_nodes(G) - gp.sub_total_domination_number(G)
-    elif invariant == "(order - slater)":
-        return gp.number_of_nodes(G) - gp.slater(G)
-    elif invariant == "(order - k_slater_index)":
-        return gp.number_of_nodes(G) - k_slater_index(G)
-    elif invariant == "(order - k_residual_index)":
-        return gp.number_of_nodes(G) - k_residual_index(G)
-    elif invariant == "order_number_of_divisors":
-        return order_number_of_divisors(G)
-    elif invariant == "order_sum_of_divisors":
-        return order_sum_of_divisors(G)
-    elif invariant == "order_euler_totient":
-        return order_euler_totient(G)
-    elif invariant == "order_mobius_function":
-        return order_mobius_function(G)
-    elif invariant == "order_sum_of_proper_divisors":
-        return order_sum_of_proper_divisors(G)
-    elif invariant == "order_sum_of_digits":
-        return order_sum_of_digits(G)
-    elif invariant == "order_product_of_digits":
-        return order_product_of_digits(G)
-    elif invariant == "order_number_of_prime_factors":
-        return order_number_of_prime_factors(G)
-    elif invariant == "order_number_of_distinct_prime_factors":
-        return order_number_of_distinct_prime_factors(G)
-    elif invariant == "independence_number_of_divisors":
-        return independence_number_of_divisors(G)
-    elif invariant == "independence_sum_of_divisors":
-        return independence_sum_of_divisors(G)
-    elif invariant == "independence_euler_totient":
-        return independence_euler_totient(G)
-    elif invariant == "independence_mobius_function":
-        return independence_mobius_function(G)
-    elif invariant == "independence_sum_of_proper_divisors":
-        return independence_sum_of_proper_divisors(G)
-    elif invariant == "independence_sum_of_digits":
-        return independence_sum_of_digits(G)
-    elif invariant == "independence_product_of_digits":
-        return independence_product_of_digits(G)
-    elif invariant == "independence_number_of_prime_factors":
-        return independence_number_of_prime_factors(G)
-    elif invariant == "independence_number_of_distinct_prime_factors":
-        return independence_number_of_distinct_prime_factors(G)
-    elif invariant == "matching_number_of_divisors":
-        return matching_number_of_divisors(G)
-    elif invariant == "matching_sum_of_divisors":
-        return matching_sum_of_divisors(G)
-    elif invariant == "matching_euler_totient":
-        return matching_euler_totient(G)
-    elif invariant == "matching_mobius_function":
-        return matching_mobius_function(G)
-    elif invariant == "matching_sum_of_proper_divisors":
-        return matching_sum_of_proper_divisors(G)
-    elif invariant == "matching_sum_of_digits":
-        return matching_sum_of_digits(G)
-    elif invariant == "matching_product_of_digits":
-        return matching_product_of_digits(G)
-    elif invariant == "matching_number_of_prime_factors":
-        return matching_number_of_prime_factors(G)
-    elif invariant == "matching_number_of_distinct_prime_factors":
-        return matching_number_of_distinct_prime_factors(G)
-    elif invariant == "zero_forcing_number_of_divisors":
-        return zero_forcing_number_of_divisors(G)
-    elif invariant == "zero_forcing_sum_of_divisors":
-        return zero_forcing_sum_of_divisors(G)
-    elif invariant == "zero_forcing_euler_totient":
-        return zero_forcing_euler_totient(G)
-    elif invariant == "zero_forcing_mobius_function":
-        return zero_forcing_mobius_function(G)
-    elif invariant == "zero_forcing_sum_of_proper_divisors":
-        return zero_forcing_sum_of_proper_divisors(G)
-    elif invariant == "zero_forcing_sum_of_digits":
-        return zero_forcing_sum_of_digits(G)
-    elif invariant == "zero_forcing_product_of_digits":
-        return zero_forcing_product_of_digits(G)
-    elif invariant == "zero_forcing_number_of_prime_factors":
-        return zero_forcing_number_of_prime_factors(G)
-    elif invariant == "zero_forcing_number_of_distinct_prime_factors":
-        return zero_forcing_number_of_distinct_prime_factors(G)
-    elif invariant == "domination_number_of_divisors":
-        return domination_number_of_divisors(G)
-    elif invariant == "domination_sum_of_divisors":
-        return domination_sum_of_divisors(G)
-    elif invariant == "domination_euler_totient":
-        return domination_euler_totient(G)
-    elif invariant == "domination_mobius_function":
-        return domination_mobius_function(G)
-    elif invariant == "domination_sum_of_proper_divisors":
-        return domination_sum_of_proper_divisors(G)
-    elif invariant == "domination_sum_of_digits":
-        return domination_sum_of_digits(G)
-    elif invariant == "domination_product_of_digits":
-        return domination_product_of_digits(G)
-    elif invariant == "domination_number_of_prime_factors":
-        return domination_number_of_prime_factors(G)
-    elif invariant == "domination_number_of_distinct_prime_factors":
-        return domination_number_of_distinct_prime_factors(G)
-    elif invariant == "min_edge_cover":
-        return len(gp.min_edge_cover(G))
-    elif invariant == "[(annihilation_number + residue)/ max_degree]":
-        return (gp.annihilation_number(G) + gp.residue(G)) / gp.max_degree(G)
-    elif invariant == "[order/ max_degree]":
-        return gp.number_of_nodes(G) / gp.max_degree(G)
-    elif invariant == "[order/ (max_degree + 1)]":
-        return gp.number_of_nodes(G) / (gp.max_degree(G) + 1)
-    elif invariant == "[order/ (max_degree - 1)]":
-        return gp.number_of_nodes(G) / (gp.max_degree(G) - 1)
-    elif invariant == "[order/ (max_degree + 2)]":
-        return gp.number_of_nodes(G) / (gp.max_degree(G) + 2)
-    elif invariant == "(residue + annihilation_number)":
-        return gp.residue(G) + gp.annihilation_number(G)
-    else:
-        return getattr(gp, invariant)(G)
-
-
-def property_check(G, property):
+    REGISTRY[name] = Node(name, function, dependencies, kind, vectorized, scalar, cheap)
+    return REGISTRY[name]
+
+
+def register_property(name, conditions):
     """
-    Returns True if a given graph G has a given graph property, and False otherwise.
+    Registers a property holding exactly when all of the given boolean conditions hold, and
+    returns its Node. The conditions are checked in order and checking stops at the first false
+    condition, so cheap conditions should come first.
 
     Parameters
     ----------
-    G : NetworkX graph
-        An undirected graph.
-    property : string
-        The name of the graph property to be checked for the graph G.
+    name : string
+        The name of the property.
+    conditions : tuple of strings
+        The names of the boolean values whose conjunction is the property.
 
     Returns
     -------
-    bool
-        True if the graph G has the given property, and False otherwise.
+    Node
+        The registered node.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import register_property
+    >>> register_property("a connected and cubic graph", ("is_connected", "is_cubic"))
     """
-    if property == "a connected graph":
-        return gp.is_connected(G)
-    elif property == "a connected and planar graph":
-        return gp.is_connected(G) and gp.check_planarity(G)[0]
-    elif property == "a connected and regular graph":
-        return gp.is_connected(G) and gp.min_degree(G) == gp.max_degree(G)
-    elif property == "a connected and cubic graph":
-        return gp.is_connected(G) and gp.min_degree(G) == 3 and gp.max_degree(G) == 3
-    elif property == "a connected graph which is not K_n":
-        return gp.is_connected(G) and gp.is_isomorphic(G, gp.complete_graph(gp.number_of_nodes(G))) == False
-    elif property == "a connected and triangle-free graph":
-        return gp.is_connected(G) and set(gp.triangles(G).values()) == {0}
-    elif property == "a connected and claw-free graph":
-        return gp.is_connected(G) and gp.is_claw_free(G)
-    elif property == "a connected and chordal graph":
-        return gp.is_connected(G) and gp.is_chordal(G)
-    elif property == "a tree graph":
-        return gp.is_connected(G) and gp.is_tree(G)
-    elif property == "a connected and at-free graph":
-        return gp.is_connected(G) and gp.is_at_free(G)
-    elif property == "an eulerian graph":
-        return gp.is_connected(G) and gp.is_eulerian(G)
-    elif property == "a connected and bipartite graph":
-        return gp.is_connected(G) and gp.is_bipartite(G)
-    elif property == "a connected graph with maximum degree at most 3":
-        return gp.is_connected(G) and gp.max_degree(G) <= 3
-    elif property == "a connected graph which is not K_n and has maximum degree at most 3":
-        return gp.is_connected(G) and gp.is_isomorphic(G, gp.complete_graph(gp.number_of_nodes(G))) == False and gp.max_degree(G) <= 3
-    elif property == "a connected and cubic graph which is not K_4":
-        return gp.is_connected(G) and gp.is_isomorphic(G, gp.complete_graph(gp.number_of_nodes(G))) == False and gp.min_degree(G) == 3 and gp.max_degree(G) == 3
-    elif property == "a connected, claw-free, and cubic graph":
-        return gp.is_connected(G) and gp.min_degree(G) == 3 and gp.max_degree(G) == 3 and gp.is_claw_free(G)
-    elif property == "a connected, planar, and cubic graph":
-        return gp.is_connected(G) and gp.min_degree(G) == 3 and gp.max_degree(G) == 3 and gp.is_planar(G)
-    elif property == "a connected graph with a prime number of vertices":
-        return gp.is_connected(G) and isprime(gp.number_of_nodes(G))
-    elif property == "a connected graph with a prime number of edges":
-        return gp.is_connected(G) and isprime(gp.number_of_edges(G))
-    elif property == "a connected graph with a prime independence number":
-        return gp.is_connected(G) and isprime(gp.independence_number(G))
-    elif property == "a connected graph with a prime diameter":
-        return gp.is_connected(G) and isprime(gp.diameter(G))
-    elif property == "a connected graph with a prime zero forcing number":
-        return gp.is_connected(G) and isprime(gp.zero_forcing_number(G))
-    elif property == "a connected graph with a prime total domination number":
-        return gp.is_connected(G) and isprime(gp.total_domination_number(G))
-    elif property == "a connected graph with a prime domination number":
-        return gp.is_connected(G) and isprime(gp.domination_number(G))
-    elif property == "a connected graph with a total domination number equal to the domination number":
-        return gp.is_connected(G) and gp.total_domination_number(G) == gp.domination_number(G)
-    elif property == "a connected graph with a prime matching number":
-        return gp.is_connected(G) and isprime(gp.matching_number(G))
-    elif property == "a connected graph with a prime residue":
-        return gp.is_connected(G) and isprime(gp.residue(G))
-    elif property == "a connected and well-covered graph":
-        return gp.is_connected(G) and gp.independence_number(G) == gp.independent_domination_number(G)
-    elif property == "a connected and Class-1 graph":
-        new_G = gp.line_graph(G)
-        return gp.is_connected(G) and gp.chromatic_number(new_G) == gp.max_degree(G)
-    elif property == "a connected and Class-2 graph":
-        new_G = gp.line_graph(G)
-        return gp.is_connected(G) and gp.chromatic_number(new_G) == gp.max_degree(G) + 1
-    elif property == "a connected graph with diameter at most 3":
-        return gp.is_connected(G) and gp.diameter(G) <= 3
-    elif property == "a connected and planar graph with diameter at most 3":
-        return gp.is_connected(G) and gp.is_planar(G) and gp.diameter(G) <= 3
-    elif property == "a connected graph with mobious(d_1) + ... + mobious(d_n) > 0":
-        return gp.is_connected(G) and sum([mobius(d) for d in gp.degree_sequence(G)]) > 0
-    elif property == "a connected graph with mobious(d_1) + ... + mobious(d_n) < 0":
-        return gp.is_connected(G) and sum([mobius(d) for d in gp.degree_sequence(G)]) < 0
-    elif property == "a connected graph with mobious(d_1) + ... + mobious(d_n) = 0":
-        return gp.is_connected(G) and sum([mobius(d) for d in gp.degree_sequence(G)]) == 0
-    elif property == "a connected graph with mobious(order) < 0":
-        return gp.is_connected(G) and mobius(gp.number_of_nodes(G)) < 0
-    elif property == "a connected graph with mobious(order) > 0":
-        return gp.is_connected(G) and mobius(gp.number_of_nodes(G)) > 0
-    elif property == "a connected graph with mobious(order) = 0":
-        return gp.is_connected(G) and mobius(gp.number_of_nodes(G)) == 0
-    else:
-        return getattr(gp, property)(G)
-
-
-def k_slater_index(G):
-    """Return a the smallest integer k so that the sub-k-domination number
-    of G is at least the domination number of G.
-    Parameters
-    ----------
-    G : NetworkX graph
-        An undirected graph.
-    Returns
-    -------
-    number
-        The smallest ineteger k such that gp.domination_number(G) <= gp.sub_k_domination_number(G, k).
+    REGISTRY[name] = Node(name, None, conditions, "property")
+    return REGISTRY[name]
+
+
+_TOKEN = re.compile(r"\s*(?:(?P<name>[A-Za-z_]\w*)|(?P<number>\d+)|(?P<symbol>[-+*/()\[\]]))")
+
+_OPERATORS = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv}
+
+
+def parse_expression(expression):
     """
-    k = 1
-    while gp.sub_k_domination_number(G, k) < gp.domination_number(G):
-        k += 1
-    return k
+    Parses an arithmetic expression over invariant names, such as "(order - domination_number)"
+    or "[order/ (max_degree + 1)]". Square brackets group like parentheses.
 
-def vertex_cover_number(G):
-    """Return a the size of smallest vertex cover in the graph G.
     Parameters
     ----------
-    G : NetworkX graph
-        An undirected graph.
+    expression : string
+        The expression, made of names, integers, +, -, *, /, and brackets.
+
     Returns
     -------
-    number
-        The size of a smallest vertex cover of G.
+    tuple
+        A pair (function, dependencies), where dependencies are the names in the expression and
+        the function maps their values, in order, to the value of the expression. The function
+        works on numbers as well as elementwise on numpy arrays. None is returned if the string is
+        not an expression with at least one operator.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import parse_expression
+    >>> function, dependencies = parse_expression("[order/ (max_degree + 1)]")
+    >>> dependencies
+    ('order', 'max_degree')
+    >>> function(10, 4)
+    2.0
+    """
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            return None
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+
+    dependencies = []
+    operator_count = [0]
+
+    def parse_binary(i, symbols, parse_operand):
+        evaluate, i = parse_operand(i)
+        while i is not None and i < len(tokens) and tokens[i][1] in symbols:
+            function = _OPERATORS[tokens[i][1]]
+            right, i = parse_operand(i + 1)
+            if i is None:
+                return None, None
+            evaluate = (lambda left, right, function: lambda values: function(left(values), right(values)))(evaluate, right, function)
+            operator_count[0] += 1
+        return evaluate, i
+
+    def parse_sum(i):
+        return parse_binary(i, "+-", parse_product)
+
+    def parse_product(i):
+        return parse_binary(i, "*/", parse_atom)
+
+    def parse_atom(i):
+        if i is None or i >= len(tokens):
+            return None, None
+        kind, text = tokens[i]
+        if kind == "name":
+            if text not in dependencies:
+                dependencies.append(text)
+            return (lambda values: values[text]), i + 1
+        if kind == "number":
+            return (lambda values: int(text)), i + 1
+        closing = {"(": ")", "[": "]"}.get(text)
+        if closing is None:
+            return None, None
+        evaluate, i = parse_sum(i + 1)
+        if i is None or i >= len(tokens) or tokens[i][1] != closing:
+            return None, None
+        return evaluate, i + 1
+
+    evaluate, i = parse_sum(0)
+    if i != len(tokens) or operator_count[0] == 0:
+        return None
+    dependencies = tuple(dependencies)
+    return (lambda *values: evaluate(dict(zip(dependencies, values)))), dependencies
+
+
+def register_expression(name, expression=None, kind="invariant"):
     """
-    return gp.number_of_nodes(G) - gp.independence_number(G)
+    Registers an invariant or intermediate value given by an arithmetic expression over other
+    values and returns its Node. Expression nodes are vectorized.
 
-def k_residual_index(G):
-    """Return a the smallest integer k so that the k-residue of G is at least the
-    independence number of G.
     Parameters
     ----------
-    G : NetworkX graph
-        An undirected graph.
+    name : string
+        The name of the value.
+    expression : string
+        The expression, see parse_expression. If None, the name itself is parsed.
+    kind : string
+        Either "invariant" or "intermediate".
+
     Returns
     -------
-    number
-        The smallest ineteger k such that gp.independence_number(G) <= gp.k_residue(G, k).
+    Node
+        The registered node.
 
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import register_expression
+    >>> register_expression("vertex_cover_number", "order - independence_number")
     """
-    k = 1
-    while gp.k_residue(G, k) < gp.independence_number(G):
-        k += 1
-    return k
+    parsed = parse_expression(name if expression is None else expression)
+    if parsed is None:
+        raise ValueError(f"{expression or name} is not an arithmetic expression.")
+    function, dependencies = parsed
+    return register(name, function, dependencies, kind, vectorized=True)
 
-from sympy import divisors, totient, mobius, primefactors
 
-def prod(iterable):
-    p = 1
-    for n in iterable:
-        p *= n
-    return p
+def get_node(name):
+    """
+    Returns the Node registered under a name. An unregistered arithmetic expression such as
+    "(size - radius)" is registered on first use. Any other unregistered name gives a node
+    applying the grinpy function of that name to the graph; an AttributeError is raised if there
+    is none.
+    """
+    if name in REGISTRY:
+        return REGISTRY[name]
+    if parse_expression(name) is not None:
+        return register_expression(name)
+    return Node(name, getattr(gp, name))
 
-def sum_mobious_function_degrees(G):
-    degree_sequence = gp.degree_sequence(G)
-    return sum(mobius(degree) for degree in degree_sequence)
 
+def evaluation_order(names):
+    """
+    Returns every value needed for the given names in dependency order, i.e., each value comes
+    after all of the values it depends on.
 
-# Define our functions
-def order_number_of_divisors(G):
-    n = gp.number_of_nodes(G)
-    return len(divisors(n))
+    Parameters
+    ----------
+    names : list of strings
+        The names of invariants, properties, or intermediate values.
 
-def order_sum_of_divisors(G):
-    n = gp.number_of_nodes(G)
-    return sum(divisors(n))
+    Returns
+    -------
+    list of strings
+        The names of the given values and of all of their transitive dependencies.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import evaluation_order
+    >>> evaluation_order(["(order - zero_forcing_number)"])
+    ['order', 'zero_forcing_number', '(order - zero_forcing_number)']
+    """
+    order = []
+    state = {}
+    for name in names:
+        stack = [(name, False)]
+        while stack:
+            name, expanded = stack.pop()
+            if name == "graph" or state.get(name) == "done":
+                continue
+            if expanded:
+                state[name] = "done"
+                order.append(name)
+                continue
+            if state.get(name) == "visiting":
+                raise ValueError(f"The dependencies of {name} form a cycle.")
+            state[name] = "visiting"
+            stack.append((name, True))
+            for dependency in reversed(get_node(name).dependencies):
+                if state.get(dependency) != "done":
+                    stack.append((dependency, False))
+    return order
+
+
+def base_computations(names):
+    """
+    Returns the values computed directly from the graph that the given names need, in
+    dependency order. All other values needed are functions of these.
 
-def order_euler_totient(G):
-    n = gp.number_of_nodes(G)
-    return totient(n)
+    Parameters
+    ----------
+    names : list of strings
+        The names of invariants, properties, or intermediate values.
 
-def order_mobius_function(G):
-    n = gp.number_of_nodes(G)
-    return mobius(n)
+    Returns
+    -------
+    list of strings
+        The names of the values that depend on the graph itself.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import base_computations
+    >>> base_computations(["(order - zero_forcing_number)", "zero_forcing_number_of_divisors"])
+    ['order', 'zero_forcing_number']
+    """
+    return [name for name in evaluation_order(names) if "graph" in get_node(name).dependencies]
 
-def order_sum_of_proper_divisors(G):
-    n = gp.number_of_nodes(G)
-    return sum(divisors(n)) - n
 
-def order_sum_of_digits(G):
-    n = gp.number_of_nodes(G)
-    return sum(int(digit) for digit in str(n))
+def _is_derived(name):
+    """
+    Returns True if the value of a name is computed from scalar values only, without the graph.
+    """
+    node = get_node(name)
+    return "graph" not in node.dependencies and all(get_node(dependency).scalar for dependency in node.dependencies)
 
-def order_product_of_digits(G):
-    n = gp.number_of_nodes(G)
-    return prod(int(digit) for digit in str(n))
 
-def order_number_of_prime_factors(G):
-    n = gp.number_of_nodes(G)
-    return len(primefactors(n))
+def split_computations(invariants, properties):
+    """
+    Splits the work for the given invariant and property columns into values computed per graph
+    and values derived afterwards from whole columns of those, see derive_columns.
 
-def order_number_of_distinct_prime_factors(G):
-    n = gp.number_of_nodes(G)
-    return len(set(primefactors(n)))
+    Invariants that are arithmetic or other functions of scalar values are derived. A property
+    is derived when all of the graph-level values its conditions need are either computed for
+    the invariants anyway or cheap; otherwise it is checked per graph, which keeps the early
+    exit of its conditions.
 
+    Parameters
+    ----------
+    invariants : list of strings
+        The invariant columns.
+    properties : list of strings
+        The property columns.
 
-# Independence number functions
-def independence_number_of_divisors(G):
-    n = gp.independence_number(G)
-    return len(divisors(n))
+    Returns
+    -------
+    tuple
+        A pair (graph_columns, derived_columns) of lists of names. The derived columns are in
+        dependency order and may include intermediate values.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import split_computations
+    >>> split_computations(["order", "(order - domination_number)"], ["a connected and cubic graph"])
+    (['order', 'domination_number', 'is_connected', 'min_degree', 'max_degree'], ['(order - domination_number)', 'is_cubic', 'a connected and cubic graph'])
+    """
+    graph_columns = []
+    derived_columns = []
+    for name in evaluation_order(invariants):
+        if _is_derived(name):
+            derived_columns.append(name)
+        elif get_node(name).scalar:
+            graph_columns.append(name)
+
+    available = set(graph_columns)
+    for property in properties:
+        order = evaluation_order([property])
+        needs = [name for name in order if not _is_derived(name) and get_node(name).scalar]
+        if all(name in available or get_node(name).cheap for name in needs):
+            for name in needs:
+                if name not in available:
+                    graph_columns.append(name)
+                    available.add(name)
+            for name in order:
+                if _is_derived(name) and name not in derived_columns:
+                    derived_columns.append(name)
+        elif property not in available:
+            graph_columns.append(property)
+            available.add(property)
+    return graph_columns, derived_columns
+
+
+def plain_value(value):
+    """
+    Returns an invariant or property value as a plain bool, int, or float.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return bool(value)
 
-def independence_sum_of_divisors(G):
-    n = gp.independence_number(G)
-    return sum(divisors(n))
 
-def independence_euler_totient(G):
-    n = gp.independence_number(G)
-    return totient(n)
+def derive_columns(df, names, failures=None):
+    """
+    Returns the dataframe with the given derived columns added. Each column is computed in one
+    operation over whole columns of the values it depends on, which must be in the dataframe or
+    come earlier in names. Vectorized nodes run on numpy arrays, a property is the elementwise
+    conjunction of its conditions, and other nodes are applied value by value without touching
+    any graph.
+
+    A value that calc would fail to compute, e.g., "[order/ max_degree]" of a graph without
+    edges, which divides by zero, is an error as well: it raises a ZeroDivisionError, or, if a
+    failures dictionary is given, its row is left out and the error is recorded. The columns
+    are then derived again from the remaining rows, so that a failed value, filled with NaN,
+    does not turn an integer or boolean column into a float column.
 
-def independence_mobius_function(G):
-    n = gp.independence_number(G)
-    return mobius(n)
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe containing the values computed per graph.
+    names : list of strings
+        The derived columns, in dependency order, e.g., as returned by split_computations.
+    failures : dict
+        If given, the rows that cannot be derived are left out of the result and added to it,
+        as a dictionary from the index label of the row to the error message.
 
-def independence_sum_of_proper_divisors(G):
-    n = gp.independence_number(G)
-    return sum(divisors(n)) - n
+    Returns
+    -------
+    pandas.DataFrame
+        The dataframe with the derived columns added.
+    """
+    derived = {}
+    errors = {}
+    for name in names:
+        node = get_node(name)
+        columns = [derived[d] if d in derived else df[d].to_numpy() for d in node.dependencies]
+        if node.kind == "property":
+            derived[name] = np.logical_and.reduce([column.astype(bool) for column in columns])
+        elif node.vectorized:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                derived[name] = np.asarray(node.function(*columns))
+            if derived[name].dtype.kind == "f":
+                for position in np.flatnonzero(~np.isfinite(derived[name])):
+                    errors.setdefault(position, f"ZeroDivisionError: {name} is not finite")
+        else:
+            values = []
+            for position, args in enumerate(zip(*(column.tolist() for column in columns))):
+                try:
+                    values.append(plain_value(node.function(*args)))
+                except ArithmeticError as error:
+                    errors.setdefault(position, f"{type(error).__name__}: {name}: {error}")
+                    values.append(float("nan"))
+            derived[name] = np.asarray(values)
+
+    if errors and failures is None:
+        position = min(errors)
+        raise ZeroDivisionError(f"{df.index[position]}: {errors[position]}")
+    if errors:
+        for position in sorted(errors):
+            failures[df.index[position]] = errors[position]
+        return derive_columns(df.drop(index=df.index[sorted(errors)]), names, failures)
+    return pd.concat([df, pd.DataFrame(derived, index=df.index)], axis=1)
+
+
+class EvaluationContext:
+    """
+    A per-graph cache of invariant values.
 
-def independence_sum_of_digits(G):
-    n = gp.independence_number(G)
-    return sum(int(digit) for digit in str(n))
+    Every registered value requested through a context is computed at most once, after the
+    values it depends on, so all of the invariants and properties of a graph that need a value
+    (the domination number, the line graph, the planarity check, ...) share a single
+    computation.
 
-def independence_product_of_digits(G):
-    n = gp.independence_number(G)
-    return prod(int(digit) for digit in str(n))
+    Attributes
+    ----------
+    G : NetworkX graph
+        The graph the values are computed for.
 
-def independence_number_of_prime_factors(G):
-    n = gp.independence_number(G)
-    return len(primefactors(n))
+    Methods
+    -------
+    value(name):
+        Returns the value of a registered name for G, computing it on first use.
+
+    Examples
+    --------
+    >>> from math_data.functions.invariant_functions import EvaluationContext
+    >>> import grinpy as gp
+    >>> context = EvaluationContext(gp.petersen_graph())
+    >>> context.value("domination_number")
+    3
+    >>> context.value("(order - domination_number)")
+    7
+    """
+    def __init__(self, G):
+        self.G = G
+        self._values = {"graph": G}
 
-def independence_number_of_distinct_prime_factors(G):
-    n = gp.independence_number(G)
-    return len(set(primefactors(n)))
+    def value(self, name):
+        if name not in self._values:
+            node = get_node(name)
+            if node.kind == "property":
+                self._values[name] = all(self.value(condition) for condition in node.dependencies)
+            else:
+                self._values[name] = node.function(*[self.value(dependency) for dependency in node.dependencies])
+        return self._values[name]
 
-# Matching number functions
-def matching_number_of_divisors(G):
-    n = gp.matching_number(G)
-    return len(divisors(n))
 
-def matching_sum_of_divisors(G):
-    n = gp.matching_number(G)
-    return sum(divisors(n))
+def _evaluation_context(G, context):
+    """
+    Returns the given context, or a fresh EvaluationContext for G when it is None.
+    """
+    return EvaluationContext(G) if context is None else context
 
-def matching_euler_totient(G):
-    n = gp.matching_number(G)
-    return totient(n)
 
-def matching_mobius_function(G):
-    n = gp.matching_number(G)
-    return mobius(n)
+def calc(G, invariant, context=None):
+    """
+    Returns the value of a given graph invariant for a given graph G.
 
-def matching_sum_of_proper_divisors(G):
-    n = gp.matching_number(G)
-    return sum(divisors(n)) - n
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+    invariant : string
+        The name of the graph invariant to be calculated for the graph G.
+    context : EvaluationContext
+        The evaluation context of G shared between invariants. A new one is created if None.
 
-def matching_sum_of_digits(G):
-    n = gp.matching_number(G)
-    return sum(int(digit) for digit in str(n))
+    Returns
+    -------
+    int
+        The value of the graph invariant for the graph G.
+    """
+    return _evaluation_context(G, context).value(invariant)
 
-def matching_product_of_digits(G):
-    n = gp.matching_number(G)
-    return prod(int(digit) for digit in str(n))
 
-def matching_number_of_prime_factors(G):
-    n = gp.matching_number(G)
-    return len(primefactors(n))
+def property_check(G, property, context=None):
+    """
+    Returns True if a given graph G has a given graph property, and False otherwise.
 
-def matching_number_of_distinct_prime_factors(G):
-    n = gp.matching_number(G)
-    return len(set(primefactors(n)))
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+    property : string
+        The name of the graph property to be checked for the graph G.
+    context : EvaluationContext
+        The evaluation context of G shared between properties. A new one is created if None.
 
-# Zero forcing number functions
-def zero_forcing_number_of_divisors(G):
-    n = gp.zero_forcing_number(G)
-    return len(divisors(n))
+    Returns
+    -------
+    bool
+        True if the graph G has the given property, and False otherwise.
+    """
+    return _evaluation_context(G, context).value(property)
 
-def zero_forcing_sum_of_divisors(G):
-    n = gp.zero_forcing_number(G)
-    return sum(divisors(n))
 
-def zero_forcing_euler_totient(G):
-    n = gp.zero_forcing_number(G)
-    return totient(n)
+def k_slater_index(G, domination_number):
+    """Return a the smallest integer k so that the sub-k-domination number
+    of G is at least the domination number of G.
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+    domination_number : int
+        The domination number of G.
+    Returns
+    -------
+    number
+        The smallest ineteger k such that gp.domination_number(G) <= gp.sub_k_domination_number(G, k).
+    """
+    k = 1
+    while gp.sub_k_domination_number(G, k) < domination_number:
+        k += 1
+    return k
 
-def zero_forcing_mobius_function(G):
-    n = gp.zero_forcing_number(G)
-    return mobius(n)
+def k_residual_index(G, independence_number):
+    """Return a the smallest integer k so that the k-residue of G is at least the
+    independence number of G.
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+    independence_number : int
+        The independence number of G.
+    Returns
+    -------
+    number
+        The smallest ineteger k such that gp.independence_number(G) <= gp.k_residue(G, k).
 
-def zero_forcing_sum_of_proper_divisors(G):
-    n = gp.zero_forcing_number(G)
-    return sum(divisors(n)) - n
+    """
+    k = 1
+    while gp.k_residue(G, k) < independence_number:
+        k += 1
+    return k
 
-def zero_forcing_sum_of_digits(G):
-    n = gp.zero_forcing_number(G)
-    return sum(int(digit) for digit in str(n))
+def is_complete(G, order):
+    """Return True if G is isomorphic to the complete graph on its vertices.
+    Parameters
+    ----------
+    G : NetworkX graph
+        An undirected graph.
+    order : int
+        The number of vertices of G.
+    Returns
+    -------
+    bool
+        True if G is a complete graph, and False otherwise.
+    """
+    return gp.is_isomorphic(G, gp.complete_graph(order))
 
-def zero_forcing_product_of_digits(G):
-    n = gp.zero_forcing_number(G)
-    return prod(int(digit) for digit in str(n))
+def prod(iterable):
+    p = 1
+    for n in iterable:
+        p *= n
+    return p
 
-def zero_forcing_number_of_prime_factors(G):
-    n = gp.zero_forcing_number(G)
-    return len(primefactors(n))
+def sum_mobious_function_degrees(degree_sequence):
+    return sum(mobius(degree) for degree in degree_sequence)
 
-def zero_forcing_number_of_distinct_prime_factors(G):
-    n = gp.zero_forcing_number(G)
-    return len(set(primefactors(n)))
 
-# Domination number functions
-def domination_number_of_divisors(G):
-    n = gp.domination_number(G)
+# Define our functions
+def number_of_divisors(n):
     return len(divisors(n))
 
-def domination_sum_of_divisors(G):
-    n = gp.domination_number(G)
+def sum_of_divisors(n):
     return sum(divisors(n))
 
-def domination_euler_totient(G):
-    n = gp.domination_number(G)
+def euler_totient(n):
     return totient(n)
 
-def domination_mobius_function(G):
-    n = gp.domination_number(G)
+def mobius_function(n):
     return mobius(n)
 
-def domination_sum_of_proper_divisors(G):
-    n = gp.domination_number(G)
+def sum_of_proper_divisors(n):
     return sum(divisors(n)) - n
 
-def domination_sum_of_digits(G):
-    n = gp.domination_number(G)
+def sum_of_digits(n):
     return sum(int(digit) for digit in str(n))
 
-def domination_product_of_digits(G):
-    n = gp.domination_number(G)
+def product_of_digits(n):
     return prod(int(digit) for digit in str(n))
 
-def domination_number_of_prime_factors(G):
-    n = gp.domination_number(G)
+def number_of_prime_factors(n):
     return len(primefactors(n))
 
-def domination_number_of_distinct_prime_factors(G):
-    n = gp.domination_number(G)
+def number_of_distinct_prime_factors(n):
     return len(set(primefactors(n)))
 
 
-
-
-
-
+# Invariants computed from the graph.
+register("order", gp.number_of_nodes, cheap=True)
+register("size", gp.number_of_edges, cheap=True)
+register("min_degree", gp.min_degree, cheap=True)
+register("max_degree", gp.max_degree, cheap=True)
+register("is_connected", gp.is_connected, cheap=True)
+register("min_edge_cover", lambda G: len(gp.min_edge_cover(G)))
+register("k_slater_index", k_slater_index, ("graph", "domination_number"))
+register("k_residual_index", k_residual_index, ("graph", "independence_number"))
+register("line_graph", gp.line_graph, kind="intermediate", scalar=False)
+register("triangles", gp.triangles, kind="intermediate", scalar=False)
+register("degree_sequence", gp.degree_sequence, kind="intermediate", scalar=False)
+
+# Invariants computed from other invariants. Names such as "(order - domination_number)" or
+# "[order/ (max_degree + 1)]" are arithmetic expressions and are registered on first use.
+register_expression("vertex_cover_number", "order - independence_number")
+
+# Number theoretic functions of integer invariants, e.g., domination_sum_of_divisors.
+for prefix, invariant in [
+    ("order", "order"),
+    ("independence", "independence_number"),
+    ("matching", "matching_number"),
+    ("zero_forcing", "zero_forcing_number"),
+    ("domination", "domination_number"),
+]:
+    for function in [
+        number_of_divisors,
+        sum_of_divisors,
+        euler_totient,
+        mobius_function,
+        sum_of_proper_divisors,
+        sum_of_digits,
+        product_of_digits,
+        number_of_prime_factors,
+        number_of_distinct_prime_factors,
+    ]:
+        register(f"{prefix}_{function.__name__}", function, (invariant,))
+
+# Conditions the properties are built from.
+register("is_regular", operator.eq, ("min_degree", "max_degree"), "intermediate", vectorized=True)
+register("is_cubic", lambda d, D: (d == 3) & (D == 3), ("min_degree", "max_degree"), "intermediate", vectorized=True)
+register("is_complete", is_complete, ("graph", "order"), "intermediate")
+register("is_not_complete", lambda complete: complete == False, ("is_complete",), "intermediate", vectorized=True)
+register("is_triangle_free", lambda triangles: set(triangles.values()) == {0}, ("triangles",), "intermediate")
+register("max_degree_at_most_3", lambda D: D <= 3, ("max_degree",), "intermediate", vectorized=True)
+register("diameter_at_most_3", lambda diameter: diameter <= 3, ("diameter",), "intermediate", vectorized=True)
+register("is_well_covered", operator.eq, ("independence_number", "independent_domination_number"), "intermediate", vectorized=True)
+register("total_domination_equals_domination", operator.eq, ("total_domination_number", "domination_number"), "intermediate", vectorized=True)
+register("chromatic_index", gp.chromatic_number, ("line_graph",), "intermediate")
+register("is_class_1", operator.eq, ("chromatic_index", "max_degree"), "intermediate", vectorized=True)
+register("is_class_2", lambda chi, D: chi == D + 1, ("chromatic_index", "max_degree"), "intermediate", vectorized=True)
+register("sum_mobious_function_degrees", sum_mobious_function_degrees, ("degree_sequence",), "intermediate")
+for invariant in [
+    "order",
+    "size",
+    "independence_number",
+    "diameter",
+    "zero_forcing_number",
+    "total_domination_number",
+    "domination_number",
+    "matching_number",
+    "residue",
+]:
+    register(f"has_prime_{invariant}", isprime, (invariant,), "intermediate")
+for sign, compare in [("positive", operator.gt), ("negative", operator.lt), ("zero", operator.eq)]:
+    register(f"has_{sign}_degree_mobius_sum", lambda s, compare=compare: compare(s, 0), ("sum_mobious_function_degrees",), "intermediate", vectorized=True)
+    register(f"has_{sign}_order_mobius", lambda m, compare=compare: compare(m, 0), ("order_mobius_function",), "intermediate", vectorized=True)
+
+# Properties, with their cheapest conditions first.
+register_property("a connected graph", ("is_connected",))
+register_property("a connected and planar graph", ("is_connected", "is_planar"))
+register_property("a connected and regular graph", ("is_connected", "is_regular"))
+register_property("a connected and cubic graph", ("is_connected", "is_cubic"))
+register_property("a connected graph which is not K_n", ("is_connected", "is_not_complete"))
+register_property("a connected and triangle-free graph", ("is_connected", "is_triangle_free"))
+register_property("a connected and claw-free graph", ("is_connected", "is_claw_free"))
+register_property("a connected and chordal graph", ("is_connected", "is_chordal"))
+register_property("a tree graph", ("is_connected", "is_tree"))
+register_property("a connected and at-free graph", ("is_connected", "is_at_free"))
+register_property("an eulerian graph", ("is_connected", "is_eulerian"))
+register_property("a connected and bipartite graph", ("is_connected", "is_bipartite"))
+register_property("a connected graph with maximum degree at most 3", ("is_connected", "max_degree_at_most_3"))
+register_property("a connected graph which is not K_n and has maximum degree at most 3", ("is_connected", "max_degree_at_most_3", "is_not_complete"))
+register_property("a connected and cubic graph which is not K_4", ("is_connected", "is_cubic", "is_not_complete"))
+register_property("a connected, claw-free, and cubic graph", ("is_connected", "is_cubic", "is_claw_free"))
+register_property("a connected, planar, and cubic graph", ("is_connected", "is_cubic", "is_planar"))
+register_property("a connected graph with a prime number of vertices", ("is_connected", "has_prime_order"))
+register_property("a connected graph with a prime number of edges", ("is_connected", "has_prime_size"))
+register_property("a connected graph with a prime independence number", ("is_connected", "has_prime_independence_number"))
+register_property("a connected graph with a prime diameter", ("is_connected", "has_prime_diameter"))
+register_property("a connected graph with a prime zero forcing number", ("is_connected", "has_prime_zero_forcing_number"))
+register_property("a connected graph with a prime total domination number", ("is_connected", "has_prime_total_domination_number"))
+register_property("a connected graph with a prime domination number", ("is_connected", "has_prime_domination_number"))
+register_property("a connected graph with a total domination number equal to the domination number", ("is_connected", "total_domination_equals_domination"))
+register_property("a connected graph with a prime matching number", ("is_connected", "has_prime_matching_number"))
+register_property("a connected graph with a prime residue", ("is_connected", "has_prime_residue"))
+register_property("a connected and well-covered graph", ("is_connected", "is_well_covered"))
+register_property("a connected and Class-1 graph", ("is_connected", "is_class_1"))
+register_property("a connected and Class-2 graph", ("is_connected", "is_class_2"))
+register_property("a connected graph with diameter at most 3", ("is_connected", "diameter_at_most_3"))
+register_property("a connected and planar graph with diameter at most 3", ("is_connected", "is_planar", "diameter_at_most_3"))
+register_property("a connected graph with mobious(d_1) + ... + mobious(d_n) > 0", ("is_connected", "has_positive_degree_mobius_sum"))
+register_property("a connected graph with mobious(d_1) + ... + mobious(d_n) < 0", ("is_connected", "has_negative_degree_mobius_sum"))
+register_property("a connected graph with mobious(d_1) + ... + mobious(d_n) = 0", ("is_connected", "has_zero_degree_mobius_sum"))
+register_property("a connected graph with mobious(order) < 0", ("is_connected", "has_negative_order_mobius"))
+register_property("a connected graph with mobious(order) > 0", ("is_connected", "has_positive_order_mobius"))
+register_property("a connected graph with mobious(order) = 0", ("is_connected", "has_zero_order_mobius"))
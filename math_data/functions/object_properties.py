@@ -1,13 +1,26 @@
+import os
 
+__all__ = ["invariant_names", "property_names"]
 
+# The files listing the names, one per line, next to this module.
+_NAME_FILES = {"invariant_names": "invariants.txt", "property_names": "properties.txt"}
 
-invariant_names = [line.rstrip("\n")
-                    for line
-                    in open("math_data/functions/invariants.txt")]
+_names = {}
 
 
-property_names = [line.rstrip("\n")
-                    for line
-                    in open("math_data/functions/properties.txt")]
+def _read_names(file_name):
+    """
+    Returns the lines of a file of names next to this module, independently of the working
+    directory.
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)) as names_file:
+        return [line.rstrip("\n") for line in names_file]
 
 
+def __getattr__(name):
+    # The name lists are read on first use instead of when the module is imported.
+    if name in _NAME_FILES:
+        if name not in _names:
+            _names[name] = _read_names(_NAME_FILES[name])
+        return _names[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")